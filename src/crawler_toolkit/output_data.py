@@ -1,27 +1,120 @@
 import re
+import io
 import os
+import gzip
 import json
+import math
+import mmap
+import time
+import asyncio
+import functools
+import queue
 import pickle
+import shutil
+import socket
+import tempfile
 import pysolr
+import requests
+import itertools
+import threading
 import traceback
 import pandas as pd
 from tqdm import tqdm
 from datetime import datetime
-from pymongo import errors, MongoClient
+from concurrent.futures import ThreadPoolExecutor
+from pymongo import errors, MongoClient, UpdateOne, ASCENDING
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
-from sqlalchemy.engine import URL
+from sqlalchemy.engine import URL, make_url
 from sqlalchemy.orm import Session
+from sqlalchemy.pool import QueuePool
+from sqlalchemy.ext.asyncio import create_async_engine
 from sqlalchemy.exc import IntegrityError
-from sqlalchemy import create_engine, select, inspect, text
+from sqlalchemy import create_engine, select, insert, update, delete, exists, and_, bindparam, inspect, text, Table, MetaData, Column
 from sqlalchemy_utils import database_exists, create_database
 
-from crawler_toolkit.share_module import LoggingSet, Message
+from crawler_toolkit.share_module import LoggingSet, Message, DataProcess
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+try:
+    import pyarrow.parquet as pq
+except ImportError:
+    pq = None
+
+JSON_DELIMITER = re.compile(r'[\s,\]]')
+
+
+class MongoClientRegistry:
+    '''MongoClient Registry
+
+    hand out one shared MongoClient per process for same connection parameters,
+    MongoClient is thread-safe and keep its own connection pool and monitor threads.
+    clients inherit from parent process are dropped after fork and re-create in child process.
+    '''
+    log = LoggingSet.get_logger(__name__)
+    _clients = dict()
+    _lock = threading.Lock()
+
+    @classmethod
+    def get_client(cls, **client_kwargs)-> MongoClient:
+        '''Get Client
+
+        return registered MongoClient which create by same `client_kwargs`, create one if not exist.
+
+        :param - `client_kwargs`: keyword arguments passing to `MongoClient`
+        '''
+        client_key = tuple(sorted(client_kwargs.items()))
+        with cls._lock:
+            client = cls._clients.get(client_key)
+            if client is None:
+                client = MongoClient(**client_kwargs)
+                cls._clients[client_key] = client
+        return client
+
+    @classmethod
+    def close_all(cls)-> None:
+        '''Close All
+
+        close all registered MongoClient and clear registry
+        '''
+        with cls._lock:
+            for client in cls._clients.values():
+                client.close()
+            cls.log.info(f'close {len(cls._clients)} shared MongoClient')
+            cls._clients = dict()
+
+    @classmethod
+    def _reset_after_fork(cls)-> None:
+        '''drop parent process clients in child process, MongoClient is not fork-safe'''
+        cls._clients = dict()
+        cls._lock = threading.Lock()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=MongoClientRegistry._reset_after_fork)
 
 
 class MongoDB_Actions:
     log = LoggingSet.get_logger(__name__)
 
-    def __init__(self, connect_info: dict) -> None:
+    def __init__(
+            self,
+            connect_info: dict,
+            shared_client: bool=True,
+            max_pool_size: int=100,
+            max_idle_time_ms: int=None,
+            auto_index: bool=False,
+            check_query_plan: bool=False,
+            docs_examined_ratio: float=10
+        ) -> None:
         '''
         passing mongodb connection dictionary:
 
@@ -33,9 +126,37 @@ class MongoDB_Actions:
             'password'     : 'YOUR_DB_PASSWORD',    str
             'auth_source'  : 'AUTH_SOURCE_DB'       str
         }
+
+        :param - `shared_client` <bool>: reuse process-wide MongoClient from `MongoClientRegistry`
+            for same connection parameters, default=True
+        :param - `max_pool_size` <int>: max connections in MongoClient pool, default=100
+        :param - `max_idle_time_ms` <int>: milliseconds connection can stay idle in pool before closed, default no limit
+        :param - `auto_index` <bool>: create index of upsert `filter_key` if not exist, default=False
+        :param - `check_query_plan` <bool>: run `explain()` on retrieve/update/delete query and log warning 
+            if plan is COLLSCAN or docs examined ratio too high, default=False
+        :param - `docs_examined_ratio` <float>: warning if totalDocsExamined / nReturned greater than ratio, default=10
         '''
         self.connect_info = connect_info
-        self.mondb = self.init_database_client()
+        self.shared_client = shared_client
+        self.max_pool_size = max_pool_size
+        self.max_idle_time_ms = max_idle_time_ms
+        self.auto_index = auto_index
+        self.check_query_plan = check_query_plan
+        self.docs_examined_ratio = docs_examined_ratio
+        self.__indexed_keys = set()
+        self.__mondb = self.init_database_client()
+
+    @property
+    def mongoDB_client(self)-> MongoClient:
+        '''MongoClient of current process, MongoClient is not fork-safe so re-create after fork'''
+        if self.__pid != os.getpid():
+            self.__mondb = self.init_database_client(database_name=self.__mondb.name)
+        return self.__client
+
+    @property
+    def mondb(self)-> object:
+        '''database of current process MongoClient'''
+        return self.mongoDB_client[self.__mondb.name]
 
     def check_connection(self):
         '''Check Connection
@@ -66,15 +187,95 @@ class MongoDB_Actions:
         # conn info
         if not database_name:
             database_name = self.connect_info.get('database_name')
-        self.mongoDB_client   = MongoClient( 
-                                        host      = self.connect_info.get('host'),
-                                        port      = self.connect_info.get('port'),
-                                        username  = self.connect_info.get('username'),
-                                        password  = self.connect_info.get('password'),
-                                        authSource= self.connect_info.get('auth_source'),
-                                        serverSelectionTimeoutMS=microsecond_timeout
-                                    )
-        return self.mongoDB_client[database_name]
+        client_kwargs = dict(
+                            host      = self.connect_info.get('host'),
+                            port      = self.connect_info.get('port'),
+                            username  = self.connect_info.get('username'),
+                            password  = self.connect_info.get('password'),
+                            authSource= self.connect_info.get('auth_source'),
+                            serverSelectionTimeoutMS=microsecond_timeout,
+                            maxPoolSize=self.max_pool_size,
+                            maxIdleTimeMS=self.max_idle_time_ms
+                        )
+        if self.shared_client:
+            self.__client = MongoClientRegistry.get_client(**client_kwargs)
+        else:
+            self.__client = MongoClient(**client_kwargs)
+        self.__pid = os.getpid()
+        return self.__client[database_name]
+
+    def close(self)-> None:
+        '''Close Client
+
+        close MongoClient which not shared, shared client close by `MongoDB_Actions.close_all()`
+        '''
+        if not self.shared_client and self.__pid == os.getpid():
+            self.__client.close()
+
+    @staticmethod
+    def close_all()-> None:
+        '''Close All Shared Client
+
+        close all process-wide shared MongoClient, call it before process exit
+        '''
+        MongoClientRegistry.close_all()
+
+    def ensure_index(self, collection_name: str, keys: str| list[tuple], unique: bool=False)-> str:
+        '''Ensure Index
+
+        create index on collection if no index start with same `keys`, return index name
+
+        :param - `collection_name` <str>: which collection to create index
+        :param - `keys` <str| list[tuple]>: single field name or list (key, direction), example: [('name', 1), ('age', -1)]
+        :param - `unique` <bool>: create unique index, default=False
+        '''
+        if isinstance(keys, str):
+            keys = [(keys, ASCENDING)]
+        collections = self.mondb[collection_name]
+        key_names = [k for k, _ in keys]
+        for index_name, index_info in collections.index_information().items():
+            if [k for k, _ in index_info['key']][:len(key_names)] == key_names:
+                return index_name
+
+        index_name = collections.create_index(keys, unique=unique)
+        MongoDB_Actions.log.info(f'create index <{index_name}> on collection <{collection_name}>')
+        return index_name
+
+    @staticmethod
+    def __plan_stages(plan: dict)-> list[str]:
+        '''collect all stage name in query plan tree'''
+        stages = [plan['stage']] if 'stage' in plan else list()
+        for child in [plan.get('inputStage'), plan.get('queryPlan'), *plan.get('inputStages', [])]:
+            if isinstance(child, dict):
+                stages += MongoDB_Actions.__plan_stages(child)
+        return stages
+
+    def explain_query(self, collection_name: str, query_syntax: dict)-> dict:
+        '''Explain Query
+
+        run `explain()` for query and return plan summary dict,
+        log warning if plan contains COLLSCAN or docs examined ratio greater than `docs_examined_ratio`
+
+        :param - `collection_name` <str>: which collection to explain query
+        :param - `query_syntax` <dict>: pymongo query to filter document
+        '''
+        explain_result = self.mondb[collection_name].find(query_syntax).explain()
+        winning_plan = explain_result.get('queryPlanner', {}).get('winningPlan', {})
+        execution_stats = explain_result.get('executionStats', {})
+        stages = self.__plan_stages(winning_plan)
+        summary = {
+            'stages'       : stages,
+            'n_returned'   : execution_stats.get('nReturned', 0),
+            'docs_examined': execution_stats.get('totalDocsExamined', 0),
+            'keys_examined': execution_stats.get('totalKeysExamined', 0),
+            'collscan'     : 'COLLSCAN' in stages
+        }
+        examined_ratio = summary['docs_examined'] / max(summary['n_returned'], 1)
+        if summary['collscan'] or examined_ratio > self.docs_examined_ratio:
+            MongoDB_Actions.log.warning(
+                f'slow query on collection <{collection_name}>: {query_syntax}, plan: {" > ".join(stages)}, '
+                f'docs examined: {summary["docs_examined"]}, returned: {summary["n_returned"]}')
+        return summary
 
     def __check_create_data(self, create_data : list[dict]| pd.DataFrame| dict)-> list[dict]:
         '''check create_data instance,
@@ -92,17 +293,70 @@ class MongoDB_Actions:
             create_data = [create_data]
         return create_data
 
-    def create(self, create_data: list[dict], collection_name: str)-> None:
+    def _bulk_insert(self, create_data: list[dict], collection_name: str, batch_size: int=1000, progress: bool=True)-> dict:
+        '''bulk insert data
+
+        insert data with `insert_many(ordered=False)` per batch, duplicate key documents are skipped
+        and the rest of batch still insert. return statistic dict `{'success', 'error', 'duplicate'}`
+
+        :param - `create_data` <list[dict]>: passing list dictionary to insert data
+        :param - `collection_name` <str>: which collection to insert data
+        :param - `batch_size` <int>: how many documents send in one `insert_many`, default=1000
+        :param - `progress` <bool>: show tqdm progress bar, default=True
+        '''
+        collections = self.mondb[collection_name]
+        statistic = {'success': 0, 'error': 0, 'duplicate': 0}
+        total_batches = tqdm(
+                            DataProcess.chunk_data(create_data, chunk_size=batch_size),
+                            total=math.ceil(len(create_data) / batch_size),
+                            leave=True,
+                            disable=not progress
+                        )
+        for batch in total_batches:
+            try:
+                insert_result = collections.insert_many(batch, ordered=False)
+                statistic['success'] += len(insert_result.inserted_ids)
+
+            except errors.BulkWriteError as e:
+                statistic['success'] += e.details.get('nInserted', 0)
+                for write_error in e.details.get('writeErrors', []):
+                    errmsg = write_error.get('errmsg', '')
+                    if write_error.get('code') == 11000 or re.findall('duplicate key', errmsg):
+                        statistic['duplicate'] += 1
+                    else:
+                        statistic['error'] += 1
+                        MongoDB_Actions.log.error(errmsg)
+
+            except Exception as e:
+                statistic['error'] += len(batch)
+                errmsg = traceback.format_exc()
+                MongoDB_Actions.log.error(errmsg)
+
+            total_batches.set_description(
+                f"[Create Data] Sucess: {statistic['success']} Error: {statistic['error']} Duplicate: {statistic['duplicate']}")
+        return statistic
+
+    def create(self, create_data: list[dict], collection_name: str, bulk: bool=False, batch_size: int=1000)-> dict:
         ''' create data
 
-        create data into collection pass if duplicate key
+        create data into collection pass if duplicate key,
+        return statistic dict `{'success', 'error', 'duplicate'}`
+
         :param - `create_data` <dict>: passing list dictionary to insert data
         :param - `collection_name` <str>: which collection to insert data
+        :param - `bulk` <bool>: insert with `insert_many(ordered=False)` per batch instead of `insert_one` per document
+        :param - `batch_size` <int>: how many documents send in one batch when `bulk=True`, default=1000
         '''
         create_data = self.__check_create_data(create_data=create_data)
         Message.splitline(f'[Mongodb Actions] write to Mongodb', 
             f'start write data to \n\tmongodb: {self.connect_info.get("database_name")} \n\tcollection: {collection_name}')
 
+        if bulk:
+            statistic = self._bulk_insert(create_data=create_data, collection_name=collection_name, batch_size=batch_size)
+            Message.splitline('Create Data to Mongodb', 
+                f'Sucess: {statistic["success"]}\nError: {statistic["error"]}\nDuplicate: {statistic["duplicate"]}')
+            return statistic
+
         collections = self.mondb[collection_name]
         sucess_num   = 0
         error_nums   = 0
@@ -140,6 +394,7 @@ class MongoDB_Actions:
                 total_create_data.refresh()
         
         Message.splitline('Create Data to Mongodb', f'Sucess: {sucess_num}\nError: {error_nums}\nDuplicate: {duplicate_data}')
+        return {'success': sucess_num, 'error': error_nums, 'duplicate': duplicate_data}
 
     def update(self, update_data: dict, collection_name: str, query_syntax: dict, upsert: bool=True):
         '''update data
@@ -155,6 +410,8 @@ class MongoDB_Actions:
             f'start update data to \n\tmongodb: {self.connect_info.get("database_name")} \n\tcollection: {collection_name}')
 
         collections = self.mondb[collection_name]
+        if self.check_query_plan:
+            self.explain_query(collection_name=collection_name, query_syntax=query_syntax)
         
         newvalues = {"$set": update_data}
         update_result = collections.update_many(query_syntax, newvalues, upsert=upsert)
@@ -165,7 +422,108 @@ class MongoDB_Actions:
 
         return update_stastic
 
-    def upsert(self, create_data: list[dict], collection_name: str, filter_key: str='_id', upsert: bool=True)-> None:
+    @staticmethod
+    def content_hash(document: dict, hash_field: str='_content_hash')-> str:
+        '''content hash
+
+        sha256 fingerprint of document, serialize with sorted keys json and exclude `hash_field`
+
+        :param - `document` <dict>: document to fingerprint
+        :param - `hash_field` <str>: field which store fingerprint, not include in hash content
+        '''
+        content = {k: v for k, v in document.items() if k != hash_field}
+        return DataProcess.str2hash256(json.dumps(content, sort_keys=True, ensure_ascii=False, default=str))
+
+    def __filter_unchanged(self, collections: object, batch: list[dict], filter_key: str, hash_field: str)-> list[dict]:
+        '''filter unchanged documents
+
+        fetch exist fingerprint of batch in one query, return new or changed documents with `hash_field` set
+        '''
+        hashed_batch = [{**i, hash_field: self.content_hash(i, hash_field=hash_field)} for i in batch]
+        exist_docs = collections.find(
+                            {filter_key: {'$in': [i[filter_key] for i in batch]}}, 
+                            projection={filter_key: 1, hash_field: 1}
+                        )
+        exist_hash = {doc.get(filter_key): doc.get(hash_field) for doc in exist_docs}
+        return [i for i in hashed_batch if exist_hash.get(i[filter_key]) != i[hash_field]]
+
+    def _bulk_upsert(
+            self,
+            create_data: list[dict],
+            collection_name: str,
+            filter_key: str='_id',
+            upsert: bool=True,
+            batch_size: int=1000,
+            progress: bool=True,
+            skip_unchanged: bool=False,
+            hash_field: str='_content_hash'
+        )-> dict:
+        '''bulk update or insert data
+
+        build `UpdateOne(..., upsert=upsert)` for each document and send with `bulk_write(ordered=False)` per batch,
+        return statistic dict `{'matched', 'modified', 'upserted', 'error'}`, and `'skipped'` if `skip_unchanged`
+
+        :param - `create_data` <list[dict]>: passing list dictionary to upsert data
+        :param - `collection_name` <str>: which collection to upsert data
+        :param - `filter_key` <str>: custom filter by create_data key, default="_id"
+        :param - `upsert` <bool>: creates a new document if no documents match the filter
+        :param - `batch_size` <int>: how many operations send in one `bulk_write`, default=1000
+        :param - `progress` <bool>: show tqdm progress bar, default=True
+        :param - `skip_unchanged` <bool>: store content fingerprint in `hash_field` and only write new or changed documents
+        :param - `hash_field` <str>: field to store content fingerprint, default="_content_hash"
+        '''
+        collections = self.mondb[collection_name]
+        statistic = {'matched': 0, 'modified': 0, 'upserted': 0, 'error': 0}
+        if skip_unchanged:
+            statistic['skipped'] = 0
+        total_batches = tqdm(
+                            DataProcess.chunk_data(create_data, chunk_size=batch_size),
+                            total=math.ceil(len(create_data) / batch_size),
+                            leave=True,
+                            disable=not progress
+                        )
+        for batch in total_batches:
+            if skip_unchanged:
+                batch_size_before = len(batch)
+                batch = self.__filter_unchanged(collections, batch=batch, filter_key=filter_key, hash_field=hash_field)
+                statistic['skipped'] += batch_size_before - len(batch)
+                if not batch:
+                    continue
+            operations = [UpdateOne({filter_key: i[filter_key]}, {"$set": i}, upsert=upsert) for i in batch]
+            try:
+                write_result = collections.bulk_write(operations, ordered=False)
+                statistic['matched']  += write_result.matched_count
+                statistic['modified'] += write_result.modified_count
+                statistic['upserted'] += write_result.upserted_count
+
+            except errors.BulkWriteError as e:
+                statistic['matched']  += e.details.get('nMatched', 0)
+                statistic['modified'] += e.details.get('nModified', 0)
+                statistic['upserted'] += e.details.get('nUpserted', 0)
+                for write_error in e.details.get('writeErrors', []):
+                    statistic['error'] += 1
+                    MongoDB_Actions.log.error(write_error.get('errmsg'))
+
+            except Exception as e:
+                statistic['error'] += len(batch)
+                errmsg = traceback.format_exc()
+                MongoDB_Actions.log.error(errmsg)
+
+            total_batches.set_description(
+                f"[Upsert Data] Matched: {statistic['matched']} Upserted: {statistic['upserted']} Error: {statistic['error']}")
+        return statistic
+
+    def upsert(
+            self,
+            create_data: list[dict],
+            collection_name: str,
+            filter_key: str='_id',
+            upsert: bool=True,
+            bulk: bool=False,
+            batch_size: int=1000,
+            skip_unchanged: bool=False,
+            hash_field: str='_content_hash'
+        )-> dict:
         ''' update or insert data
 
         InsertData to collection update if document match filter by "filter_key"
@@ -174,9 +532,33 @@ class MongoDB_Actions:
         :param - `collection_name` <str>: which collection to insert data
         :param - `filter_key` <str>: custom filter by create_data key, default="_id"
         :param - `upsert` <bool>: creates a new document if no documents match the filter
+        :param - `bulk` <bool>: send `UpdateOne` with `bulk_write(ordered=False)` per batch instead of `update_many` per document,
+            return statistic dict `{'matched', 'modified', 'upserted', 'error'}`
+        :param - `batch_size` <int>: how many operations send in one batch when `bulk=True`, default=1000
+        :param - `skip_unchanged` <bool>: incremental mode, store content fingerprint in `hash_field` and skip documents 
+            which fingerprint not changed, always write with bulk path and report `'skipped'` count
+        :param - `hash_field` <str>: field to store content fingerprint, default="_content_hash"
         '''
         
         create_data = self.__check_create_data(create_data=create_data)
+        if self.auto_index and (collection_name, filter_key) not in self.__indexed_keys:
+            self.ensure_index(collection_name=collection_name, keys=filter_key)
+            self.__indexed_keys.add((collection_name, filter_key))
+        if bulk or skip_unchanged:
+            Message.splitline(f'[Mongodb Actions] write to Mongodb', 
+                f'start write data to \n\tmongodb: {self.connect_info.get("database_name")} \n\tcollection: {collection_name}')
+            statistic = self._bulk_upsert(
+                                create_data=create_data, 
+                                collection_name=collection_name,
+                                filter_key=filter_key,
+                                upsert=upsert,
+                                batch_size=batch_size,
+                                skip_unchanged=skip_unchanged,
+                                hash_field=hash_field
+                            )
+            Message.splitline('Write to Mongodb', '\n'.join(f'{k.title()}: {v}' for k, v in statistic.items()))
+            return statistic
+
         sucess_num   = 0
         error_nums   = 0
         duplicate_data = 0
@@ -214,20 +596,85 @@ class MongoDB_Actions:
                 total_create_data.refresh()
                 
         Message.splitline('Write to Mongodb', f'Sucess: {sucess_num}\nError: {error_nums}\nDuplicate: {duplicate_data}')
-
-    def retrieve(self, collection_name: str, query_syntax: dict={}, how: str='finds')-> list[dict]:
+        return {'success': sucess_num, 'error': error_nums, 'duplicate': duplicate_data}
+
+    def iter_retrieve(
+            self,
+            collection_name: str,
+            query_syntax: dict={},
+            projection: dict| list=None,
+            sort: list[tuple]=None,
+            limit: int=0,
+            skip: int=0,
+            batch_size: int=1000,
+            chunk_size: int=None
+        ):
+        '''iterate retrieve data
+
+        Retrieve data from collection by pymongo syntax query and yield document from cursor one by one,
+        only `batch_size` documents hold in memory each time.
+        if passing `chunk_size` yield list[dict] with `chunk_size` documents.
+
+        :param - `collection_name` <str>: which collection to retrieve data
+        :param - `query_syntax` <dict>: pymongo query to filter document
+        :param - `projection` <dict| list>: fields to return, example: {'name': 1, '_id': 0}
+        :param - `sort` <list[tuple]>: sort by list (key, direction), example: [('age', -1)]
+        :param - `limit` <int>: max documents to return, 0 is no limit
+        :param - `skip` <int>: documents to skip before return
+        :param - `batch_size` <int>: documents fetch from server in each cursor batch, default=1000
+        :param - `chunk_size` <int>: yield list[dict] with `chunk_size` documents instead of single document
+        '''
+        collections = self.mondb[collection_name]
+        if self.check_query_plan:
+            self.explain_query(collection_name=collection_name, query_syntax=query_syntax)
+        cursor = collections.find(query_syntax, projection=projection, skip=skip, limit=limit, batch_size=batch_size)
+        if sort:
+            cursor = cursor.sort(sort)
+        try:
+            if chunk_size:
+                yield from DataProcess.chunk_data(cursor, chunk_size=chunk_size)
+            else:
+                yield from cursor
+        finally:
+            cursor.close()
+
+    def retrieve(
+            self,
+            collection_name: str,
+            query_syntax: dict={},
+            how: str='finds',
+            projection: dict| list=None,
+            sort: list[tuple]=None,
+            limit: int=0,
+            skip: int=0
+        )-> list[dict]:
         '''retrieve data 
         
         Retrieve data from collection by pymongo syntax query.
+        for large collection use `iter_retrieve` to fetch document with constant memory.
         
         :param - `collection_name` <str>: which collection to insert data
         :param - `query_syntax` <dict>: pymongo query to filter document
+        :param - `how` <str>: "finds" fetch all match documents, "find" fetch one document
+        :param - `projection` <dict| list>: fields to return, example: {'name': 1, '_id': 0}
+        :param - `sort` <list[tuple]>: sort by list (key, direction) only work with how="finds"
+        :param - `limit` <int>: max documents to return only work with how="finds", 0 is no limit
+        :param - `skip` <int>: documents to skip only work with how="finds"
         '''
         collections = self.mondb[collection_name]
         if how == 'finds':
-            result = [doc for doc in collections.find(query_syntax)]
+            result = list(self.iter_retrieve(
+                                collection_name=collection_name,
+                                query_syntax=query_syntax,
+                                projection=projection,
+                                sort=sort,
+                                limit=limit,
+                                skip=skip
+                            ))
         elif how == 'find':
-            result = [collections.find_one(query_syntax)]
+            if self.check_query_plan:
+                self.explain_query(collection_name=collection_name, query_syntax=query_syntax)
+            result = [collections.find_one(query_syntax, projection=projection)]
         else:
             raise ValueError('args "how" only accept ["find"|"finds"]')
         Message.splitline('fetch data', f'total document: {len(result)}')
@@ -242,6 +689,8 @@ class MongoDB_Actions:
         :param - `query_syntax` <dict>: pymongo query to filter document
         '''
         collections = self.mondb[collection_name]
+        if self.check_query_plan:
+            self.explain_query(collection_name=collection_name, query_syntax=query_syntax)
         delete_action = collections.delete_one(query_syntax)
         delete_statistic = delete_action.raw_result
         return delete_statistic
@@ -275,19 +724,336 @@ class MongoDB_Actions:
         return string_format
 
 
+class BufferedMongoWriter:
+    log = LoggingSet.get_logger(__name__)
+    _STOP = object()
+
+    def __init__(
+            self,
+            mongo_actions: MongoDB_Actions,
+            collection_name: str,
+            how: str='create',
+            filter_key: str='_id',
+            batch_size: int=1000,
+            flush_interval: float=5,
+            max_queue_size: int=10000
+        )-> None:
+        '''Write-Behind Buffered Writer
+
+        `put()` document into bounded queue and background thread write with bulk write
+        when buffer reach `batch_size` or every `flush_interval` seconds.
+        `put()` only block when queue is full, call `close()` or use `with` to drain queue before exit.
+
+        :param - `mongo_actions` <MongoDB_Actions>: MongoDB_Actions object to write data
+        :param - `collection_name` <str>: which collection to write data
+        :param - `how` <str>: "create" write with bulk insert, "upsert" write with bulk upsert, default="create"
+        :param - `filter_key` <str>: upsert filter by document key, only work with how="upsert", default="_id"
+        :param - `batch_size` <int>: flush when buffer documents reach `batch_size`, default=1000
+        :param - `flush_interval` <float>: flush buffer every `flush_interval` seconds, default=5
+        :param - `max_queue_size` <int>: max documents wait in queue before `put()` block, default=10000
+        '''
+        if how not in ['create', 'upsert']:
+            raise ValueError('args "how" only accept ["create"|"upsert"]')
+        self.mongo_actions = mongo_actions
+        self.collection_name = collection_name
+        self.how = how
+        self.filter_key = filter_key
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.statistic = dict()
+        self.__queue = queue.Queue(maxsize=max_queue_size)
+        self.__closed = False
+        self.__worker = threading.Thread(target=self.__run, name=f'BufferedMongoWriter-{collection_name}', daemon=True)
+        self.__worker.start()
+
+    def put(self, document: dict, timeout: float=None)-> None:
+        '''Put document
+
+        put document into write queue, block if queue is full until `timeout` seconds then raise `queue.Full`
+
+        :param - `document` <dict>: document to write
+        :param - `timeout` <float>: seconds to wait when queue is full, default wait forever
+        '''
+        if self.__closed:
+            raise RuntimeError('BufferedMongoWriter already closed')
+        self.__queue.put(document, timeout=timeout)
+
+    def flush(self, timeout: float=None)-> bool:
+        '''Flush
+
+        block until all document put before `flush()` are written, return `False` if timeout
+
+        :param - `timeout` <float>: seconds to wait for flush, default wait forever
+        '''
+        if self.__closed:
+            return True
+        flushed = threading.Event()
+        self.__queue.put(flushed)
+        return flushed.wait(timeout=timeout)
+
+    def close(self)-> dict:
+        '''Close
+
+        drain queue, write remaining documents and stop background thread, return statistic dict
+        '''
+        if not self.__closed:
+            self.__closed = True
+            self.__queue.put(self._STOP)
+            self.__worker.join()
+            Message.splitline(f'[BufferedMongoWriter] close writer <{self.collection_name}>', 
+                '\n'.join(f'{k}: {v}' for k, v in self.statistic.items()))
+        return self.statistic
+
+    def __write(self, buffer: list[dict])-> None:
+        '''write buffer documents with bulk write and merge statistic'''
+        try:
+            if self.how == 'create':
+                statistic = self.mongo_actions._bulk_insert(
+                                create_data=buffer, 
+                                collection_name=self.collection_name, 
+                                batch_size=self.batch_size, 
+                                progress=False
+                            )
+            else:
+                statistic = self.mongo_actions._bulk_upsert(
+                                create_data=buffer, 
+                                collection_name=self.collection_name, 
+                                filter_key=self.filter_key,
+                                batch_size=self.batch_size, 
+                                progress=False
+                            )
+        except Exception as e:
+            statistic = {'error': len(buffer)}
+            errmsg = traceback.format_exc()
+            BufferedMongoWriter.log.error(errmsg)
+
+        for k, v in statistic.items():
+            self.statistic[k] = self.statistic.get(k, 0) + v
+
+    def __run(self)-> None:
+        '''background thread collect documents from queue and flush by size or time'''
+        buffer = list()
+        deadline = time.monotonic() + self.flush_interval
+        while True:
+            try:
+                item = self.__queue.get(timeout=max(deadline - time.monotonic(), 0))
+            except queue.Empty:
+                item = None
+
+            stop = item is self._STOP
+            flushed = item if isinstance(item, threading.Event) else None
+            if item is not None and not stop and not flushed:
+                buffer.append(item)
+
+            time_up = time.monotonic() >= deadline
+            if buffer and (stop or flushed or time_up or len(buffer) >= self.batch_size):
+                self.__write(buffer)
+                buffer = list()
+            if time_up or flushed:
+                deadline = time.monotonic() + self.flush_interval
+            if flushed:
+                flushed.set()
+            if stop:
+                break
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, exc_traceback):
+        self.close()
+
+    def __repr__(self) -> str:
+        rep = f'BufferedMongoWriter(mongo_actions={self.mongo_actions!r}, collection_name={self.collection_name!r}, how={self.how!r})'
+        return rep
+
+
+class AsyncMongoDB_Actions:
+    log = LoggingSet.get_logger(__name__)
+
+    def __init__(self, connect_info: dict, max_workers: int=None, **mongo_kwargs)-> None:
+        '''Asyncio MongoDB_Actions
+
+        same create/retrieve/update/upsert/delete surface as `MongoDB_Actions` but awaitable,
+        blocking pymongo call run in thread pool so many in-flight write can overlap on one event loop.
+
+        :param - `connect_info` <dict>: mongodb connection dictionary, see `MongoDB_Actions`
+        :param - `max_workers` <int>: max concurrent database calls, default use asyncio default executor
+        :param - `mongo_kwargs`: other keyword arguments passing to `MongoDB_Actions`
+        '''
+        self.mongo_actions = MongoDB_Actions(connect_info=connect_info, **mongo_kwargs)
+        self.executor = ThreadPoolExecutor(max_workers=max_workers) if max_workers else None
+
+    async def __run(self, func: object, **kwargs)-> object:
+        '''run blocking function in executor'''
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, functools.partial(func, **kwargs))
+
+    async def check_connection(self)-> bool:
+        '''see `MongoDB_Actions.check_connection`'''
+        return await self.__run(self.mongo_actions.check_connection)
+
+    async def create(self, create_data: list[dict], collection_name: str, **kwargs)-> dict:
+        '''see `MongoDB_Actions.create`'''
+        return await self.__run(self.mongo_actions.create, create_data=create_data, collection_name=collection_name, **kwargs)
+
+    async def upsert(self, create_data: list[dict], collection_name: str, **kwargs)-> dict:
+        '''see `MongoDB_Actions.upsert`'''
+        return await self.__run(self.mongo_actions.upsert, create_data=create_data, collection_name=collection_name, **kwargs)
+
+    async def retrieve(self, collection_name: str, query_syntax: dict={}, **kwargs)-> list[dict]:
+        '''see `MongoDB_Actions.retrieve`'''
+        return await self.__run(self.mongo_actions.retrieve, collection_name=collection_name, query_syntax=query_syntax, **kwargs)
+
+    async def update(self, update_data: dict, collection_name: str, query_syntax: dict, upsert: bool=True)-> dict:
+        '''see `MongoDB_Actions.update`'''
+        return await self.__run(
+                        self.mongo_actions.update, 
+                        update_data=update_data, 
+                        collection_name=collection_name, 
+                        query_syntax=query_syntax, 
+                        upsert=upsert
+                    )
+
+    async def delete(self, collection_name: str, query_syntax: dict)-> dict:
+        '''see `MongoDB_Actions.delete`'''
+        return await self.__run(self.mongo_actions.delete, collection_name=collection_name, query_syntax=query_syntax)
+
+    async def drop_collection(self, collection_name: str)-> bool:
+        '''see `MongoDB_Actions.drop_collection`'''
+        return await self.__run(self.mongo_actions.drop_collection, collection_name=collection_name)
+
+    async def close(self)-> None:
+        '''close not shared client and executor'''
+        self.mongo_actions.close()
+        if self.executor:
+            self.executor.shutdown(wait=True)
+
+    def __repr__(self) -> str:
+        rep = f'AsyncMongoDB_Actions(mongo_actions={self.mongo_actions!r})'
+        return rep
+
+
+class TimedQueuePool(QueuePool):
+    '''Timed QueuePool
+
+    QueuePool which record how long checkout wait for connection
+    '''
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.__stats_lock = threading.Lock()
+        self.__checkouts = 0
+        self.__total_wait = 0.0
+        self.__max_wait = 0.0
+
+    def _do_get(self):
+        start_time = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            wait_time = time.perf_counter() - start_time
+            with self.__stats_lock:
+                self.__checkouts += 1
+                self.__total_wait += wait_time
+                self.__max_wait = max(self.__max_wait, wait_time)
+
+    def wait_stats(self)-> dict:
+        '''return checkout count and wait seconds statistic'''
+        with self.__stats_lock:
+            return {
+                'checkouts'       : self.__checkouts,
+                'total_wait_time' : self.__total_wait,
+                'avg_wait_time'   : self.__total_wait / self.__checkouts if self.__checkouts else 0.0,
+                'max_wait_time'   : self.__max_wait
+            }
+
+
+class SQLEngineRegistry:
+    '''SQL Engine Registry
+
+    hand out one shared Engine per process for same connection url and engine parameters.
+    engines inherit from parent process drop pooled connections after fork without closing parent connections.
+    '''
+    log = LoggingSet.get_logger(__name__)
+    _engines = dict()
+    _lock = threading.Lock()
+
+    @classmethod
+    def get_engine(cls, url: object, **engine_kwargs)-> object:
+        '''Get Engine
+
+        return registered Engine which create by same `url` and `engine_kwargs`, create one if not exist.
+
+        :param - `url` <URL>: sqlalchemy connection url
+        :param - `engine_kwargs`: keyword arguments passing to `create_engine`
+        '''
+        engine_key = (url.render_as_string(hide_password=False), tuple(sorted(engine_kwargs.items())))
+        with cls._lock:
+            engine = cls._engines.get(engine_key)
+            if engine is None:
+                engine = create_engine(url, **engine_kwargs)
+                cls._engines[engine_key] = engine
+        return engine
+
+    @classmethod
+    def dispose_all(cls)-> None:
+        '''Dispose All
+
+        dispose all registered Engine connection pool and clear registry
+        '''
+        with cls._lock:
+            for engine in cls._engines.values():
+                engine.dispose()
+            cls.log.info(f'dispose {len(cls._engines)} shared Engine')
+            cls._engines = dict()
+
+    @classmethod
+    def _reset_after_fork(cls)-> None:
+        '''drop parent process pooled connections in child process'''
+        cls._lock = threading.Lock()
+        for engine in cls._engines.values():
+            engine.dispose(close=False)
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=SQLEngineRegistry._reset_after_fork)
+
+
 class MsSQL_Actions:
     log = LoggingSet.get_logger(__name__)
 
-    def __init__(self, connect_info: dict|str=None, echo=False):
+    def __init__(
+            self, 
+            connect_info: dict|str=None, 
+            echo=False, 
+            fast_executemany: bool=True,
+            shared_engine: bool=True,
+            pool_size: int=None,
+            max_overflow: int=None,
+            pool_pre_ping: bool=False,
+            pool_recycle: int=-1
+        ):
         '''Connection Information Passing
 
         :param - `connect_info` <dict|str>: passing dict connection object, or string connection url
             see more on: https://docs.sqlalchemy.org/en/20/core/engines.html
         :param - `echo` <bool>: passing bool True or False to show Query information
+        :param - `fast_executemany` <bool>: enable pyodbc `fast_executemany`, only work with "mssql+pyodbc" driver, default=True
+        :param - `shared_engine` <bool>: reuse process-wide Engine from `SQLEngineRegistry` for same url and settings, default=True
+        :param - `pool_size` <int>: connections keep in pool, default use sqlalchemy setting (5)
+        :param - `max_overflow` <int>: connections can open over `pool_size`, default use sqlalchemy setting (10)
+        :param - `pool_pre_ping` <bool>: test connection is alive before checkout, default=False
+        :param - `pool_recycle` <int>: seconds connection recycle after open, -1 is never recycle, default=-1
+            > `pool_size`, `max_overflow` only work with database which use QueuePool, like sql server or sqlite file
         '''
 
         self.connect_info = connect_info
         self.echo = echo
+        self.fast_executemany = fast_executemany
+        self.shared_engine = shared_engine
+        self.pool_size = pool_size
+        self.max_overflow = max_overflow
+        self.pool_pre_ping = pool_pre_ping
+        self.pool_recycle = pool_recycle
         self.db_engine = self.init_engine()
         
     @staticmethod
@@ -328,7 +1094,56 @@ class MsSQL_Actions:
         URI = self.connect_info
         if isinstance(self.connect_info, dict):
             URI = self.create_connection_uri(connect_info=self.connect_info)
-        return create_engine(URI, echo=self.echo)
+        URI = make_url(URI)
+
+        engine_kwargs = {'echo': self.echo, 'pool_pre_ping': self.pool_pre_ping, 'pool_recycle': self.pool_recycle}
+        if URI.drivername == 'mssql+pyodbc':
+            engine_kwargs['fast_executemany'] = self.fast_executemany
+        if issubclass(URI.get_dialect().get_pool_class(URI), QueuePool):
+            engine_kwargs['poolclass'] = TimedQueuePool
+            if self.pool_size is not None:
+                engine_kwargs['pool_size'] = self.pool_size
+            if self.max_overflow is not None:
+                engine_kwargs['max_overflow'] = self.max_overflow
+
+        if self.shared_engine:
+            return SQLEngineRegistry.get_engine(URI, **engine_kwargs)
+        return create_engine(URI, **engine_kwargs)
+
+    def pool_status(self)-> dict:
+        '''Pool Status
+
+        return connection pool statistic, QueuePool include size, checked out, idle and overflow connections
+        and checkout wait time
+        '''
+        pool = self.db_engine.pool
+        status = {'pool_class': type(pool).__name__, 'status': pool.status()}
+        if isinstance(pool, QueuePool):
+            status.update({
+                'size'       : pool.size(),
+                'checked_out': pool.checkedout(),
+                'idle'       : pool.checkedin(),
+                'overflow'   : pool.overflow()
+            })
+        if isinstance(pool, TimedQueuePool):
+            status.update(pool.wait_stats())
+        return status
+
+    def close(self)-> None:
+        '''Close Engine
+
+        dispose Engine which not shared, shared Engine dispose by `MsSQL_Actions.close_all()`
+        '''
+        if not self.shared_engine:
+            self.db_engine.dispose()
+
+    @staticmethod
+    def close_all()-> None:
+        '''Close All Shared Engine
+
+        dispose all process-wide shared Engine, call it before process exit
+        '''
+        SQLEngineRegistry.dispose_all()
 
     def check_connection(self):
         '''Check Connection
@@ -377,18 +1192,61 @@ class MsSQL_Actions:
             result_data[c.key] = getattr(row, c.key)
         return result_data
 
-    def create(self, datas: dict| list[dict], table_model: object)-> None:
+    def __bulk_create(self, datas: list[dict], table_model: object, chunk_size: int=1000, return_ids: bool=False)-> None:
+        '''Bulk Create Data with Core insert
+
+        insert each chunk with executemany in one transaction, rows in chunk group by same columns.
+        data keys are table model attribute keys, translate to column keys for Core insert.
+        if `return_ids` fetch primary key with `RETURNING` (`OUTPUT INSERTED.Id` on SQL Server) and update back to datas
+        '''
+        table = table_model.__table__
+        column_keys = MsSQL_Actions._column_keys(table_model)
+        primary_key = list(table.primary_key.columns)[0]
+        primary_attr = {v: k for k, v in column_keys.items()}.get(primary_key.key, primary_key.key)
+        insert_stmt = insert(table)
+        if return_ids:
+            insert_stmt = insert_stmt.returning(primary_key, sort_by_parameter_order=True)
+
+        total_chunks = tqdm(DataProcess.chunk_data(datas, chunk_size=chunk_size), total=math.ceil(len(datas) / chunk_size), leave=True)
+        with self.db_engine.begin() as conn:
+            for chunk in total_chunks:
+                column_groups = dict()
+                for data in chunk:
+                    column_groups.setdefault(tuple(data.keys()), list()).append(data)
+
+                for group_datas in column_groups.values():
+                    group_rows = [MsSQL_Actions._data2columns(data, column_keys, table.name) for data in group_datas]
+                    insert_result = conn.execute(insert_stmt, group_rows)
+                    if return_ids:
+                        for data, data_id in zip(group_datas, insert_result.scalars()):
+                            data.update({primary_attr: data_id})
+                total_chunks.set_description(f'[Create Data] insert table <{table.name}>')
+        Message.splitline('Write to MsSQL', f'Total Insert: {len(datas)}')
+
+    def create(
+            self, 
+            datas: dict| list[dict], 
+            table_model: object, 
+            bulk: bool=False, 
+            chunk_size: int=1000, 
+            return_ids: bool=False
+        )-> None:
         '''Create Data with ORM
 
         Passing dict or list[dict] and Table class, insert data to table.
 
         :param - `datas` <dict| list[dict]>: dict or list[dict] to insert data
         :param - `table_model` <object>: sqlalchemy table class object
+        :param - `bulk` <bool>: insert with Core `insert()` executemany per chunk instead of ORM object per row
+        :param - `chunk_size` <int>: rows insert in one executemany when `bulk=True`, default=1000
+        :param - `return_ids` <bool>: when `bulk=True` fetch generated primary key and update to datas, default=False
         '''
         if not isinstance(datas, (list, dict)):
             raise TypeError('datas only support dict and list type')
         if isinstance(datas, dict):
             datas = [datas]
+        if bulk:
+            return self.__bulk_create(datas=datas, table_model=table_model, chunk_size=chunk_size, return_ids=return_ids)
 
         with Session(self.db_engine) as session, session.begin():
             for datas in datas:
@@ -398,29 +1256,261 @@ class MsSQL_Actions:
                 datas.update({'Id' : modeldata_obj.Id})
             session.commit()
 
-    def retrieve(self, table_model: object, filter_by_dict: dict)-> list[dict]:
-        '''### Retrieve Data With ORM
-        Passing class table schema class, query by dictionary key:value.
-        
-        > ps. if value passing list[str], filter value in list[str] else 
-        equal value
+    def __merge_stage(self, conn: object, table: object, stage_table: object, key_columns: list[str])-> dict:
+        '''merge staging table into target table, return `{'inserted', 'updated'}`
 
+        SQL Server run one `MERGE ... OUTPUT $action`, other database run set-based `UPDATE` then `INSERT ... SELECT`
+        '''
+        # identity column never update, and SQL Server reject explicit insert into identity column
+        identity_columns = [c.key for c in table.columns if c.identity is not None or c is table.autoincrement_column]
+        update_columns = [c.key for c in stage_table.columns if c.key not in key_columns + identity_columns]
+        if self.db_engine.dialect.name == 'mssql':
+            preparer = self.db_engine.dialect.identifier_preparer
+            column_name = lambda key: preparer.quote(table.c[key].name)
+            merge_syntax = (
+                f'MERGE INTO {preparer.format_table(table)} WITH (HOLDLOCK) AS t '
+                f'USING {preparer.format_table(stage_table)} AS s '
+                f'ON {" AND ".join(f"t.{column_name(k)} = s.{column_name(k)}" for k in key_columns)} '
+            )
+            if update_columns:
+                merge_syntax += f'WHEN MATCHED THEN UPDATE SET {", ".join(f"t.{column_name(k)} = s.{column_name(k)}" for k in update_columns)} '
+            insert_columns = [c.key for c in stage_table.columns if c.key not in identity_columns]
+            merge_syntax += (
+                f'WHEN NOT MATCHED BY TARGET THEN INSERT ({", ".join(column_name(k) for k in insert_columns)}) '
+                f'VALUES ({", ".join(f"s.{column_name(k)}" for k in insert_columns)}) '
+                f'OUTPUT $action;'
+            )
+            merge_actions = conn.execute(text(merge_syntax)).scalars().all()
+            return {'inserted': merge_actions.count('INSERT'), 'updated': merge_actions.count('UPDATE')}
+
+        match_condition = and_(*[stage_table.c[k] == table.c[k] for k in key_columns])
+        updated = 0
+        if update_columns:
+            update_stmt = update(table).where(exists().where(match_condition)).values({
+                                k: select(stage_table.c[k]).where(match_condition).scalar_subquery() for k in update_columns
+                            })
+            updated = conn.execute(update_stmt).rowcount
+
+        insert_stmt = insert(table).from_select(
+                            [c.key for c in stage_table.columns],
+                            select(*stage_table.columns).where(~exists().where(match_condition))
+                        )
+        inserted = conn.execute(insert_stmt).rowcount
+        return {'inserted': inserted, 'updated': updated}
+
+    def bulk_upsert(
+            self, 
+            datas: dict| list[dict], 
+            table_model: object, 
+            key_columns: str| list[str], 
+            chunk_size: int=1000
+        )-> dict:
+        '''Bulk Update or Insert Data
+
+        stage each chunk into temp table with executemany and merge into table by `key_columns` with set-based statement,
+        update matched rows and insert others, return statistic dict `{'inserted', 'updated'}`.
+        data keys and `key_columns` are table model attribute keys, key not mapped to column raise ValueError.
+        rows stage and merge group by same columns, column not in row keep untouched (or column default on insert),
+        identity column never updated or inserted on SQL Server, rows with same key in one chunk keep the last one.
+
+        :param - `datas` <dict| list[dict]>: dict or list[dict] to upsert data
         :param - `table_model` <object>: sqlalchemy table class object
-        :param - `filter_by_dict` <dict>: query by dictionary key:value
+        :param - `key_columns` <str| list[str]>: columns to match exist rows
+        :param - `chunk_size` <int>: rows merge in one statement, default=1000
         '''
+        if not isinstance(datas, (list, dict)):
+            raise TypeError('datas only support dict and list type')
+        if isinstance(datas, dict):
+            datas = [datas]
+        if isinstance(key_columns, str):
+            key_columns = [key_columns]
+
+        table = table_model.__table__
+        if any(k not in d for d in datas for k in key_columns):
+            raise ValueError(f'key_columns {key_columns} not found in datas')
+        column_keys = MsSQL_Actions._column_keys(table_model)
+        key_columns = list(MsSQL_Actions._data2columns(dict.fromkeys(key_columns), column_keys, table.name).keys())
+
+        stage_tables = dict()
+        def get_stage_table(conn: object, column_keys: tuple)-> Table:
+            '''staging table with same columns as rows, create once for each column set'''
+            if column_keys not in stage_tables:
+                stage_name = f'stage_{table.name}_{len(stage_tables)}'
+                stage_columns = [Column(table.c[k].name, table.c[k].type, key=k) for k in column_keys]
+                if self.db_engine.dialect.name == 'mssql':
+                    stage_table = Table(f'#{stage_name}', MetaData(), *stage_columns)
+                else:
+                    stage_table = Table(stage_name, MetaData(), *stage_columns, prefixes=['TEMPORARY'])
+                stage_table.create(conn)
+                stage_tables[column_keys] = stage_table
+            return stage_tables[column_keys]
+
+        statistic = {'inserted': 0, 'updated': 0}
+        total_chunks = tqdm(DataProcess.chunk_data(datas, chunk_size=chunk_size), total=math.ceil(len(datas) / chunk_size), leave=True)
+        with self.db_engine.connect() as conn:
+            try:
+                for chunk in total_chunks:
+                    rows = [MsSQL_Actions._data2columns(d, column_keys, table.name) for d in chunk]
+                    unique_rows = {tuple(d[k] for k in key_columns): d for d in rows}
+                    # rows group by same columns, column missing in row never staged as NULL
+                    column_groups = dict()
+                    for d in unique_rows.values():
+                        column_keys = tuple(c.key for c in table.columns if c.key in d)
+                        column_groups.setdefault(column_keys, list()).append(d)
+
+                    for column_keys, group_rows in column_groups.items():
+                        stage_table = get_stage_table(conn, column_keys)
+                        conn.execute(insert(stage_table), [{k: d[k] for k in column_keys} for d in group_rows])
+                        merge_result = self.__merge_stage(conn, table=table, stage_table=stage_table, key_columns=key_columns)
+                        conn.execute(stage_table.delete())
+                        for k, v in merge_result.items():
+                            statistic[k] += v
+                    conn.commit()
+                    total_chunks.set_description(f'[Upsert Data] Inserted: {statistic["inserted"]} Updated: {statistic["updated"]}')
+            except Exception as e:
+                conn.rollback()
+                errmssg = traceback.format_exc()
+                self.log.error(errmssg)
+                raise
+            finally:
+                for stage_table in stage_tables.values():
+                    stage_table.drop(conn, checkfirst=True)
+                conn.commit()
+
+        Message.splitline('Upsert to MsSQL', f'Inserted: {statistic["inserted"]}\nUpdated: {statistic["updated"]}')
+        return statistic
+
+    @staticmethod
+    def _column_keys(table_model: object)-> dict:
+        '''table model attribute key map to table column key, attribute key same keys as `row2dict`'''
+        return {column_attr.key: column_attr.columns[0].key for column_attr in inspect(table_model).column_attrs}
+
+    @staticmethod
+    def _data2columns(data: dict, column_keys: dict, table_name: str)-> dict:
+        '''translate data attribute keys to table column keys, raise on key not mapped'''
+        unknown_keys = set(data) - set(column_keys)
+        if unknown_keys:
+            raise ValueError(f'keys {sorted(unknown_keys)} not mapped column of table <{table_name}>')
+        return {column_keys[k]: v for k, v in data.items()}
+
+    @staticmethod
+    def _table_columns(table_model: object)-> list:
+        '''table model mapped columns label by attribute key, same keys as `row2dict`'''
+        return [column_attr.columns[0].label(column_attr.key) for column_attr in inspect(table_model).column_attrs]
+
+    @staticmethod
+    def _filter_query(sqry: object, table_model: object, filter_by_dict: dict)-> object:
+        '''add where condition by dictionary key:value, list value filter with `IN`'''
         if not isinstance(filter_by_dict, dict):
             raise TypeError('argument <filter_by_dict> only support "dict" type')
 
-        sqry = select(table_model)
         for k, v in filter_by_dict.items():
             if isinstance(v, list):
                 sqry = sqry.filter(table_model.__dict__[k].in_(v))
             else:
                 sqry = sqry.where(table_model.__dict__[k] == v)
+        return sqry
+
+    def __stage_in_values(self, conn: object, table_model: object, large_lists: dict)-> dict:
+        '''bulk load large list values into temp tables, return {key: temp table}'''
+        temp_tables = dict()
+        for k, values in large_lists.items():
+            column_type = table_model.__dict__[k].type
+            if self.db_engine.dialect.name == 'mssql':
+                temp_table = Table(f'#in_{k}', MetaData(), Column('value', column_type))
+            else:
+                temp_table = Table(f'in_{k}', MetaData(), Column('value', column_type), prefixes=['TEMPORARY'])
+            temp_table.create(conn)
+            temp_tables[k] = temp_table
+            conn.execute(insert(temp_table), [{'value': v} for v in values])
+        return temp_tables
+
+    def iter_retrieve(
+            self, 
+            table_model: object, 
+            filter_by_dict: dict={}, 
+            chunk_size: int=None, 
+            yield_per: int=1000,
+            in_chunk_size: int=1000,
+            large_in: str='chunk'
+        ):
+        '''### Iterate Retrieve Data Without ORM
+        Select table columns with Core and stream result from server, yield dict one by one 
+        or list[dict] with `chunk_size` rows. dict keys same as `row2dict`.
 
-        with Session(self.db_engine) as session:
-            query_result_data = session.execute(sqry).scalars().all()
-            return  [self.row2dict(row) for row in query_result_data]
+        > ps. if value passing list[str], filter value in list[str] else 
+        equal value, list longer than `in_chunk_size` (SQL Server only accept 2100 parameters)
+        split into chunk queries or load into temp table by `large_in`, result merge transparently.
+
+        :param - `table_model` <object>: sqlalchemy table class object
+        :param - `filter_by_dict` <dict>: query by dictionary key:value
+        :param - `chunk_size` <int>: yield list[dict] with `chunk_size` rows instead of single dict
+        :param - `yield_per` <int>: rows fetch from server each time, default=1000
+        :param - `in_chunk_size` <int>: max values of list in one `IN`, default=1000
+        :param - `large_in` <str>: "chunk" query each `in_chunk_size` values, 
+            "temp_table" bulk load values into temp table and filter with subquery, default="chunk"
+        '''
+        if large_in not in ['chunk', 'temp_table']:
+            raise ValueError('args "large_in" only accept ["chunk"|"temp_table"]')
+        if not isinstance(filter_by_dict, dict):
+            raise TypeError('argument <filter_by_dict> only support "dict" type')
+
+        large_lists = {
+            k: list(dict.fromkeys(v)) for k, v in filter_by_dict.items() 
+            if isinstance(v, list) and len(v) > in_chunk_size
+        }
+        small_filter = {k: v for k, v in filter_by_dict.items() if k not in large_lists}
+        sqry = self._filter_query(select(*self._table_columns(table_model)), table_model=table_model, filter_by_dict=small_filter)
+
+        with self.db_engine.connect() as conn:
+            temp_tables = dict()
+            try:
+                if large_lists and large_in == 'temp_table':
+                    temp_tables = self.__stage_in_values(conn, table_model=table_model, large_lists=large_lists)
+                    queries = [sqry.where(*[table_model.__dict__[k].in_(select(t.c.value)) for k, t in temp_tables.items()])]
+                else:
+                    value_chunks = [DataProcess.chunk_data(v, chunk_size=in_chunk_size) for v in large_lists.values()]
+                    queries = (
+                        sqry.where(*[table_model.__dict__[k].in_(chunk) for k, chunk in zip(large_lists.keys(), chunks)])
+                        for chunks in itertools.product(*value_chunks)
+                    )
+
+                conn.execution_options(stream_results=True, yield_per=yield_per)
+                rows = (dict(row) for query in queries for row in conn.execute(query).mappings())
+                if chunk_size:
+                    yield from DataProcess.chunk_data(rows, chunk_size=chunk_size)
+                else:
+                    yield from rows
+            finally:
+                for temp_table in temp_tables.values():
+                    temp_table.drop(conn, checkfirst=True)
+                conn.commit()
+
+    def retrieve(
+            self, 
+            table_model: object, 
+            filter_by_dict: dict, 
+            in_chunk_size: int=1000, 
+            large_in: str='chunk'
+        )-> list[dict]:
+        '''### Retrieve Data
+        Passing class table schema class, query by dictionary key:value.
+        for large table use `iter_retrieve` to stream rows.
+        
+        > ps. if value passing list[str], filter value in list[str] else 
+        equal value, list longer than `in_chunk_size` handle by `large_in`, see `iter_retrieve`
+
+        :param - `table_model` <object>: sqlalchemy table class object
+        :param - `filter_by_dict` <dict>: query by dictionary key:value
+        :param - `in_chunk_size` <int>: max values of list in one `IN`, default=1000
+        :param - `large_in` <str>: "chunk" or "temp_table", default="chunk"
+        '''
+        return list(self.iter_retrieve(
+                        table_model=table_model, 
+                        filter_by_dict=filter_by_dict, 
+                        in_chunk_size=in_chunk_size, 
+                        large_in=large_in
+                    ))
                 
     def update(self, table_model: object, data_id: str, update_data: dict)-> None:
         '''Update Data with ORM
@@ -466,21 +1556,125 @@ class MsSQL_Actions:
             else:
                 session.commit()
 
-    def syntax_query(self, query_syntax: str)-> list[dict]:
+    def batch_update(
+            self, 
+            table_model: object, 
+            update_data: dict| list[dict], 
+            data_ids: list=None, 
+            id_column: str='Id', 
+            chunk_size: int=1000
+        )-> int| None:
+        '''Batch Update Data
+
+        update many rows in one transaction, return total updated rows.
+        - passing `data_ids`: `update_data` is dict changes apply to all ids, update with chunked `IN`
+        - without `data_ids`: `update_data` is list[dict] records with `id_column` and changes, update with executemany,
+            return None when driver not support executemany rowcount (`supports_sane_multi_rowcount`, e.g. mssql+pyodbc)
+
+        :param - `table_model` <object>: sqlalchemy table class object
+        :param - `update_data` <dict| list[dict]>: dict changes or list[dict] records, example: [{'Id': 1, 'AccountType': 'A'}]
+        :param - `data_ids` <list>: data ids to apply `update_data` dict changes
+        :param - `id_column` <str>: column to filter which record to update, default="Id"
+        :param - `chunk_size` <int>: ids or records in one statement, default=1000
+        '''
+        table = table_model.__table__
+        id_col = table.c[id_column]
+        updated = 0
+        with self.db_engine.begin() as conn:
+            try:
+                if data_ids is not None:
+                    if not isinstance(update_data, dict):
+                        raise TypeError('update_data only support "dict" type when passing data_ids')
+                    for chunk in DataProcess.chunk_data(data_ids, chunk_size=chunk_size):
+                        updated += conn.execute(update(table).where(id_col.in_(chunk)).values(update_data)).rowcount
+                else:
+                    update_data = [update_data] if isinstance(update_data, dict) else update_data
+                    for chunk in DataProcess.chunk_data(update_data, chunk_size=chunk_size):
+                        column_groups = dict()
+                        for record in chunk:
+                            change_keys = tuple(k for k in record.keys() if k != id_column)
+                            column_groups.setdefault(change_keys, list()).append(record)
+
+                        for change_keys, records in column_groups.items():
+                            update_stmt = update(table).where(id_col == bindparam('batch_id')).values(
+                                                {k: bindparam(f'batch_{k}') for k in change_keys})
+                            params = [{'batch_id': r[id_column], **{f'batch_{k}': r[k] for k in change_keys}} for r in records]
+                            updated += conn.execute(update_stmt, params).rowcount
+                    # executemany rowcount not reliable on driver like pyodbc
+                    if not conn.dialect.supports_sane_multi_rowcount:
+                        updated = None
+            except Exception as e:
+                errmssg = traceback.format_exc()
+                self.log.error(errmssg)
+                raise
+        Message.splitline('Update MsSQL', f'Total Update: {updated}')
+        return updated
+
+    def batch_delete(self, table_model: object, data_ids: list, id_column: str='Id', chunk_size: int=1000)-> int:
+        '''Batch Delete Data
+
+        delete rows by list ids with chunked `IN` in one transaction, return total deleted rows.
+
+        :param - `table_model` <object>: sqlalchemy table class object
+        :param - `data_ids` <list>: data ids to filter which records to delete
+        :param - `id_column` <str>: column to filter which record to delete, default="Id"
+        :param - `chunk_size` <int>: ids in one statement, default=1000
+        '''
+        table = table_model.__table__
+        deleted = 0
+        with self.db_engine.begin() as conn:
+            try:
+                for chunk in DataProcess.chunk_data(data_ids, chunk_size=chunk_size):
+                    deleted += conn.execute(delete(table).where(table.c[id_column].in_(chunk))).rowcount
+            except Exception as e:
+                errmssg = traceback.format_exc()
+                self.log.error(errmssg)
+                raise
+        Message.splitline('Delete MsSQL', f'Total Delete: {deleted}')
+        return deleted
+
+    def syntax_query(self, query_syntax: str, params: dict=None)-> list[dict]:
         '''Syntax query with string
         
-        Passing SQL query string syntax for query data
+        Passing SQL query string syntax for query data,
+        for large result use `iter_syntax_query` to stream rows.
 
         :param - `query_syntax` <string>: SQL query syntax to query data
+        :param - `params` <dict>: bind parameters of `:name` in query syntax, 
+            example: syntax_query('SELECT * FROM T WHERE Id = :id', {'id': 1})
         '''
         if not isinstance(query_syntax, str):
             raise TypeError('argument <query_syntax> only support "string" type')
 
         with Session(self.db_engine) as session:
-            qry_result = session.execute(text(query_syntax)).fetchall()
+            qry_result = session.execute(text(query_syntax), params or {}).fetchall()
             result = [row._asdict() for row in qry_result]
         return result
 
+    def iter_syntax_query(self, query_syntax: str, params: dict=None, chunk_size: int=1000, as_dataframe: bool=False):
+        '''Iterate syntax query with string
+
+        Passing SQL query string syntax and stream result from server, 
+        yield list[dict] or pandas DataFrame with `chunk_size` rows.
+
+        :param - `query_syntax` <string>: SQL query syntax to query data
+        :param - `params` <dict>: bind parameters of `:name` in query syntax
+        :param - `chunk_size` <int>: rows in each yield chunk, default=1000
+        :param - `as_dataframe` <bool>: yield pandas DataFrame instead of list[dict], default=False
+        '''
+        if not isinstance(query_syntax, str):
+            raise TypeError('argument <query_syntax> only support "string" type')
+
+        with self.db_engine.connect() as conn:
+            conn.execution_options(stream_results=True, yield_per=chunk_size)
+            qry_result = conn.execute(text(query_syntax), params or {})
+            columns = list(qry_result.keys())
+            for partition in qry_result.partitions(chunk_size):
+                if as_dataframe:
+                    yield pd.DataFrame.from_records(partition, columns=columns)
+                else:
+                    yield [dict(zip(columns, row)) for row in partition]
+
     def drop_table(self, table_model: object)-> None:
         '''Drop Table with table class
         
@@ -506,6 +1700,167 @@ class MsSQL_Actions:
         return string_format
 
 
+class AsyncMsSQL_Actions:
+    log = LoggingSet.get_logger(__name__)
+
+    def __init__(self, connect_info: dict|str=None, echo=False, **engine_kwargs):
+        '''Asyncio Connection Information Passing
+
+        same create/retrieve/update/delete surface as `MsSQL_Actions` with sqlalchemy async engine,
+        connection url should use async driver, example: "mssql+aioodbc", "sqlite+aiosqlite"
+
+        :param - `connect_info` <dict|str>: passing dict connection object, or string connection url
+            see more on: https://docs.sqlalchemy.org/en/20/orm/extensions/asyncio.html
+        :param - `echo` <bool>: passing bool True or False to show Query information
+        :param - `engine_kwargs`: other keyword arguments passing to `create_async_engine`, like `pool_size`
+        '''
+        if not isinstance(connect_info, (dict, str)):
+            raise TypeError('connect_info Type Error can\'t init engine')
+
+        self.connect_info = connect_info
+        self.echo = echo
+        URI = connect_info
+        if isinstance(connect_info, dict):
+            URI = MsSQL_Actions.create_connection_uri(connect_info=connect_info)
+        self.db_engine = create_async_engine(URI, echo=echo, **engine_kwargs)
+
+    async def check_connection(self)-> bool:
+        '''Check Connection
+
+        Query "SELECT 1" to Check Connection
+        return `True` or `False`.
+        '''
+        try:
+            async with self.db_engine.connect() as conn:
+                result = (await conn.execute(text('SELECT 1'))).fetchall()
+                print(result)
+        except Exception as e:
+            err_mssg = traceback.format_exc()
+            print(err_mssg)
+            return False
+        else:
+            print('connection sucessful.')
+            return True
+
+    async def init_database(self, model_metadb: object)-> None:
+        '''Init Table Which Not Exist
+
+        Create passing table model tables, database should already exist.
+
+        :param - `model_metadb` <class>: declarative_base class object
+        '''
+        async with self.db_engine.begin() as conn:
+            await conn.run_sync(model_metadb.metadata.create_all)
+        Message.splitline('[DataBaseAction] init database', f'init all table schema <{list(model_metadb.metadata.tables.keys())}>')
+
+    async def create(self, datas: dict| list[dict], table_model: object, chunk_size: int=1000)-> None:
+        '''Create Data
+
+        Passing dict or list[dict] and Table class, insert data with Core `insert()` executemany per chunk.
+
+        :param - `datas` <dict| list[dict]>: dict or list[dict] to insert data
+        :param - `table_model` <object>: sqlalchemy table class object
+        :param - `chunk_size` <int>: rows insert in one executemany, default=1000
+        '''
+        if not isinstance(datas, (list, dict)):
+            raise TypeError('datas only support dict and list type')
+        if isinstance(datas, dict):
+            datas = [datas]
+
+        async with self.db_engine.begin() as conn:
+            for chunk in DataProcess.chunk_data(datas, chunk_size=chunk_size):
+                column_groups = dict()
+                for data in chunk:
+                    column_groups.setdefault(tuple(data.keys()), list()).append(data)
+                for group_datas in column_groups.values():
+                    await conn.execute(insert(table_model.__table__), group_datas)
+
+    async def iter_retrieve(self, table_model: object, filter_by_dict: dict={}, chunk_size: int=None):
+        '''Iterate Retrieve Data
+
+        async generator stream rows, yield dict one by one or list[dict] with `chunk_size` rows.
+
+        :param - `table_model` <object>: sqlalchemy table class object
+        :param - `filter_by_dict` <dict>: query by dictionary key:value, list value filter with `IN`
+        :param - `chunk_size` <int>: yield list[dict] with `chunk_size` rows instead of single dict
+        '''
+        sqry = MsSQL_Actions._filter_query(
+                    select(*MsSQL_Actions._table_columns(table_model)), 
+                    table_model=table_model, 
+                    filter_by_dict=filter_by_dict
+                )
+        async with self.db_engine.connect() as conn:
+            query_result = (await conn.stream(sqry)).mappings()
+            if chunk_size:
+                async for partition in query_result.partitions(chunk_size):
+                    yield [dict(row) for row in partition]
+            else:
+                async for row in query_result:
+                    yield dict(row)
+
+    async def retrieve(self, table_model: object, filter_by_dict: dict)-> list[dict]:
+        '''Retrieve Data
+
+        :param - `table_model` <object>: sqlalchemy table class object
+        :param - `filter_by_dict` <dict>: query by dictionary key:value, list value filter with `IN`
+        '''
+        return [row async for row in self.iter_retrieve(table_model=table_model, filter_by_dict=filter_by_dict)]
+
+    async def update(self, table_model: object, data_id: str, update_data: dict)-> None:
+        '''Update Data
+        
+        :param - `table_model` <object>: sqlalchemy table class object
+        :param - `data_id` <string>: data id  to filter which record to update
+        :param - `update_data` <dict>: dictionary to update table columns: value
+        '''
+        async with self.db_engine.begin() as conn:
+            await conn.execute(update(table_model).where(table_model.Id==data_id).values(update_data))
+
+    async def delete(self, table_model: object, data_id: str)-> None:
+        '''Delete Data
+        
+        :param - `table_model` <object>: sqlalchemy table class object
+        :param - `data_id` <string>: data id  to filter which record to delete 
+        '''
+        async with self.db_engine.begin() as conn:
+            await conn.execute(delete(table_model).where(table_model.Id==data_id))
+
+    async def syntax_query(self, query_syntax: str, params: dict=None)-> list[dict]:
+        '''Syntax query with string
+
+        :param - `query_syntax` <string>: SQL query syntax to query data
+        :param - `params` <dict>: bind parameters of `:name` in query syntax
+        '''
+        if not isinstance(query_syntax, str):
+            raise TypeError('argument <query_syntax> only support "string" type')
+
+        async with self.db_engine.connect() as conn:
+            qry_result = (await conn.execute(text(query_syntax), params or {})).fetchall()
+        return [row._asdict() for row in qry_result]
+
+    async def drop_table(self, table_model: object)-> None:
+        '''Drop Table with table class
+
+        :param - `table_model` <object>: sqlalchemy table class object
+        '''
+        try:
+            async with self.db_engine.begin() as conn:
+                await conn.run_sync(table_model.__table__.drop)
+        except Exception as e:
+            err_mssg = traceback.format_exc()
+            self.log.error(err_mssg)
+        else:
+            print(f'Drop Table <{table_model.__tablename__}> Successful')
+
+    async def close(self)-> None:
+        '''dispose engine connection pool'''
+        await self.db_engine.dispose()
+
+    def __repr__(self):
+        rep = f'AsyncMsSQL_Actions(connect_info={self.connect_info!r}, db_engine={self.db_engine!r}, echo={self.echo})'
+        return rep
+
+
 class Files_Actions:
     log = LoggingSet.get_logger(__name__)
     
@@ -587,10 +1942,143 @@ class Files_Actions:
         return auth_dicts
     
     @staticmethod
-    def updateJson(update_data: list[dict], file_path: str)-> None:
+    def __iter_json_array(file_path: str, encoding: str='utf-8', buffer_size: int=65536):
+        '''parse top-level json array from file buffer by buffer, yield each element'''
+        decoder = json.JSONDecoder()
+        with open(file_path, 'r', encoding=encoding) as f:
+            buffer, pos, eof = '', 0, False
+            expect = '['
+            while True:
+                while pos < len(buffer) and buffer[pos].isspace():
+                    pos += 1
+                if pos == len(buffer):
+                    if eof:
+                        raise ValueError(f'unexpected end of json array: {file_path}')
+                    buffer, pos = f.read(buffer_size), 0
+                    eof = not buffer
+                    continue
+
+                char = buffer[pos]
+                if expect == '[':
+                    if char != '[':
+                        raise ValueError(f'json file top-level is not an array: {file_path}')
+                    pos, expect = pos + 1, 'value_or_end'
+                elif char == ']' and expect in ['value_or_end', 'comma_or_end']:
+                    return
+                elif expect == 'comma_or_end':
+                    if char != ',':
+                        raise ValueError(f'expect "," between json array elements: {file_path}')
+                    pos, expect = pos + 1, 'value'
+                else:
+                    # value may cut off by buffer end, read more and decode again,
+                    # number like "12.|5" decode as prefix "12", complete only when followed by delimiter
+                    try:
+                        record, end = decoder.raw_decode(buffer, pos)
+                        truncated = not eof and not JSON_DELIMITER.search(buffer, end)
+                    except ValueError as e:
+                        if eof:
+                            raise
+                        truncated = True
+                    if truncated:
+                        read_data = f.read(max(buffer_size, len(buffer) - pos))
+                        eof = not read_data
+                        buffer, pos = buffer[pos:] + read_data, 0
+                        continue
+                    yield record
+                    pos, expect = end, 'comma_or_end'
+
+    @staticmethod
+    def iterJson(
+            file_path: str, 
+            chunk_size: int=None, 
+            filter_func: object=None, 
+            encoding: str='utf-8', 
+            buffer_size: int=65536
+        ):
+        '''Iterate Json Array From Filepath
+
+        Incremental parse top-level json array file, yield record one by one or list[dict] with `chunk_size` records,
+        only hold `buffer_size` characters and current record in memory.
+
+        :param - `file_path` <str>: load file from filepath
+        :param - `chunk_size` <int>: yield list[dict] with `chunk_size` records instead of single record
+        :param - `filter_func` <function>: only yield record which `filter_func(record)` return True
+        :param - `encoding` <str>: read with encoding code. default=`utf-8`
+        :param - `buffer_size` <int>: characters read from file each time, default=65536
+        '''
+        Files_Actions.check_exist_and_isfile(file_path=file_path)
+        records = Files_Actions.__iter_json_array(file_path=file_path, encoding=encoding, buffer_size=buffer_size)
+        if filter_func:
+            records = (record for record in records if filter_func(record))
+        if chunk_size:
+            yield from DataProcess.chunk_data(records, chunk_size=chunk_size)
+        else:
+            yield from records
+
+    @staticmethod
+    def __index_key(values)-> tuple:
+        '''hashable index key of filter values, unhashable value index by json string'''
+        return tuple(
+            v if isinstance(v, (str, int, float, bool, type(None))) else ('__json__', json.dumps(v, sort_keys=True, default=str)) 
+            for v in values
+        )
+
+    @staticmethod
+    def __dump_array_item(record: object, indent: int, ensure_ascii: bool)-> str:
+        '''dump single json array element, same layout as `json.dump(list)`'''
+        item = json.dumps(record, indent=indent, ensure_ascii=ensure_ascii)
+        if indent is None:
+            return item
+        prefix = ' ' * indent if isinstance(indent, int) else indent
+        return '\n'.join(prefix + line for line in item.split('\n'))
+
+    @staticmethod
+    def __write_json_array(records, output_path: str, indent: int=4, ensure_ascii: bool=False, encoding: str='utf-8')-> int:
+        '''stream records to temporary file as json array, same layout as `json.dump(list)`,
+        replace `output_path` after all records written, return records count'''
+        output_dir, output_name = os.path.split(os.path.abspath(output_path))
+        fd, tmp_path = tempfile.mkstemp(prefix=f'.{output_name}.', suffix='.tmp', dir=output_dir)
+        try:
+            # mkstemp create with 0600, keep original file permission or default permission of new file
+            if os.path.isfile(output_path):
+                shutil.copymode(output_path, tmp_path)
+            else:
+                umask = os.umask(0)
+                os.umask(umask)
+                os.chmod(tmp_path, 0o666 & ~umask)
+            with os.fdopen(fd, 'w', encoding=encoding) as f:
+                separator = (',\n', '\n') if indent is not None else (', ', '')
+                f.write('[')
+                count = 0
+                for record in records:
+                    f.write(separator[0 if count else 1] + Files_Actions.__dump_array_item(record, indent, ensure_ascii))
+                    count += 1
+                f.write(separator[1] + ']' if count else ']')
+                # data must reach disk before rename, or crash may leave empty file after replace
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, output_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return count
+
+    @staticmethod
+    def updateJson(
+            update_data: list[dict], 
+            file_path: str, 
+            upsert: bool=False, 
+            indent: int=4, 
+            ensure_ascii: bool=False, 
+            encoding: str='utf-8'
+        )-> dict:
         '''Update Json Files
 
         Only update which passing filter_by dict condition data, and saving back to json file.
+        Updates are indexed by filter values, file records are streamed once and written to a
+        temporary file which replace the original file after all records written.
+        `filter_by` compare with the record loaded from file, before any update applied.
 
         :param - `update_data` list[dict]: update 
             see example:
@@ -599,19 +2087,304 @@ class Files_Actions:
                                 'update_data': {'name': 'rock'}
                     }, {...}]
         :param - `file_path` <str>: load file from path and update dict object
+        :param - `upsert` <bool>: append `{**filter_by, **update_data}` for update not matched any record
+        :return - <dict>: `matched`/`unmatched` update counts, `updated` records count and `upserted` records count
         '''
         Files_Actions.check_exist_and_isfile(file_path=file_path)
 
         update_data = [update_data] if isinstance(update_data, dict) else update_data
-        file_data = Files_Actions.readJson(file_path=file_path)
-        for uda in update_data:
-            # if not found data add to list
-            for dic in file_data:
-                if Files_Actions.check_filter_key(dict_data=dic, filter_by=uda['filter_by']):
-                    dic.update(uda['update_data'])
-                    Message.splitline('[updateJson] update sucess', dic)
-        # output result
-        Files_Actions.toJson(output_data=file_data, output_path=file_path, append=False)
+        # {filter keys: {filter values: [update position]}}
+        update_index = dict()
+        for i, uda in enumerate(update_data):
+            filter_keys = tuple(uda['filter_by'].keys())
+            filter_values = Files_Actions.__index_key(uda['filter_by'][k] for k in filter_keys)
+            update_index.setdefault(filter_keys, dict()).setdefault(filter_values, list()).append(i)
+
+        matched = set()
+        statistic = {'matched': 0, 'unmatched': 0, 'updated': 0, 'upserted': 0}
+        def iter_updated():
+            for record in Files_Actions.iterJson(file_path=file_path, encoding=encoding):
+                if isinstance(record, dict):
+                    hits = list()
+                    for filter_keys, value_index in update_index.items():
+                        if all(k in record for k in filter_keys):
+                            hits += value_index.get(Files_Actions.__index_key(record[k] for k in filter_keys), [])
+                    # apply in update_data order, same as update one by one
+                    for i in sorted(hits):
+                        record.update(update_data[i]['update_data'])
+                    matched.update(hits)
+                    statistic['updated'] += bool(hits)
+                yield record
+
+            if upsert:
+                # updates with same filter values merge into one new record
+                unmatched = [p for vi in update_index.values() for p in vi.values() if p[0] not in matched]
+                for positions in sorted(unmatched):
+                    record = dict(update_data[positions[0]]['filter_by'])
+                    for i in positions:
+                        record.update(update_data[i]['update_data'])
+                    yield record
+                    statistic['upserted'] += 1
+
+        Files_Actions.__write_json_array(
+            records=iter_updated(), 
+            output_path=file_path, 
+            indent=indent, 
+            ensure_ascii=ensure_ascii, 
+            encoding=encoding
+        )
+
+        statistic['matched'] = len(matched)
+        statistic['unmatched'] = len(update_data) - len(matched)
+        Message.splitline('[updateJson] update finish', statistic)
+        return statistic
+
+    @staticmethod
+    def _open_text(file_path: str, mode: str, encoding: str='utf-8', compression: str='infer')-> io.TextIOBase:
+        '''open text file with `gzip` / `zstd` / no compression, mode only support r, w, a'''
+        if compression == 'infer':
+            compression = {'.gz': 'gzip', '.zst': 'zstd', '.zstd': 'zstd'}.get(os.path.splitext(file_path)[1].lower())
+        if compression is None:
+            return open(file_path, mode, encoding=encoding)
+        elif compression == 'gzip':
+            return gzip.open(file_path, mode + 't', encoding=encoding)
+        elif compression == 'zstd':
+            if zstandard is None:
+                raise ImportError('zstd compression require "zstandard", pip install zstandard')
+            if mode == 'r':
+                # read across frames, each append write one frame
+                raw = zstandard.ZstdDecompressor().stream_reader(open(file_path, 'rb'), read_across_frames=True, closefd=True)
+            else:
+                raw = zstandard.ZstdCompressor().stream_writer(open(file_path, mode + 'b'), closefd=True)
+            return io.TextIOWrapper(raw, encoding=encoding)
+        raise ValueError(f'compression only support "gzip", "zstd", None or "infer", got: {compression}')
+
+    @staticmethod
+    def toJsonl(
+            output_data: dict| list[dict], 
+            output_path: str, 
+            append: bool=True,
+            ensure_ascii: bool=False,
+            encoding: str='utf-8',
+            compression: str='infer'
+        )-> None:
+        '''Write dictionary to Json Lines file
+
+        one json record per line, append only write new records to end of file 
+        and flush after each call. compressed file append each call as new gzip member / zstd frame.
+
+        :param - `output_data` <dict| list[dict]>: output_data a dict or list dict
+        :param - `output_path` <str>: the path where file store
+        :param - `append` <bool>: passing `True` or `False` to append data into file, default is True
+        :param - `compression` <str>: `gzip`, `zstd`, None or `infer` from file extension (.gz, .zst), default=`infer`
+        '''
+        if isinstance(output_data, dict):
+            output_data = [output_data]
+
+        with Files_Actions._open_text(output_path, 'a' if append else 'w', encoding=encoding, compression=compression) as f:
+            for data in output_data:
+                f.write(json.dumps(data, ensure_ascii=ensure_ascii) + '\n')
+            f.flush()
+
+    @staticmethod
+    def iterJsonl(
+            file_path: str, 
+            chunk_size: int=None, 
+            columns: list[str]=None, 
+            encoding: str='utf-8', 
+            compression: str='infer'
+        ):
+        '''Iterate Json Lines From Filepath
+
+        yield record one by one, or list[dict] with `chunk_size` records, blank line skipped.
+
+        :param - `file_path` <str>: load file from filepath
+        :param - `chunk_size` <int>: yield list[dict] with `chunk_size` records instead of single record
+        :param - `columns` <list[str]>: only keep these keys of each record, default keep all
+        :param - `encoding` <str>: read with encoding code. default=`utf-8`
+        :param - `compression` <str>: `gzip`, `zstd`, None or `infer` from file extension (.gz, .zst), default=`infer`
+        '''
+        Files_Actions.check_exist_and_isfile(file_path=file_path)
+        with Files_Actions._open_text(file_path, 'r', encoding=encoding, compression=compression) as f:
+            records = (json.loads(line) for line in f if line.strip())
+            if columns:
+                records = ({k: record[k] for k in columns if k in record} for record in records)
+            if chunk_size:
+                yield from DataProcess.chunk_data(records, chunk_size=chunk_size)
+            else:
+                yield from records
+
+    @staticmethod
+    def readJsonl(file_path: str, columns: list[str]=None, encoding: str='utf-8', compression: str='infer')-> list[dict]:
+        '''Read Json Lines From Filepath
+
+        :param - `file_path` <str>: load file from filepath
+        :param - `columns` <list[str]>: only keep these keys of each record, default keep all
+        :param - `encoding` <str>: read with encoding code. default=`utf-8`
+        :param - `compression` <str>: `gzip`, `zstd`, None or `infer` from file extension (.gz, .zst), default=`infer`
+        '''
+        return list(Files_Actions.iterJsonl(file_path=file_path, columns=columns, encoding=encoding, compression=compression))
+
+    @staticmethod
+    def json2jsonl(file_path: str, output_path: str, encoding: str='utf-8', compression: str='infer')-> None:
+        '''Convert Json Array File To Json Lines File
+
+        stream records from json array file to json lines file, not load whole file into memory.
+
+        :param - `file_path` <str>: json array file path
+        :param - `output_path` <str>: output json lines file path
+        :param - `compression` <str>: output compression, `gzip`, `zstd`, None or `infer` from file extension, default=`infer`
+        '''
+        Files_Actions.toJsonl(
+            output_data=Files_Actions.iterJson(file_path=file_path, encoding=encoding), 
+            output_path=output_path, 
+            append=False, 
+            encoding=encoding, 
+            compression=compression
+        )
+
+    @staticmethod
+    def jsonl2json(
+            file_path: str, 
+            output_path: str, 
+            indent: int=4, 
+            ensure_ascii: bool=False, 
+            encoding: str='utf-8', 
+            compression: str='infer'
+        )-> None:
+        '''Convert Json Lines File To Json Array File
+
+        stream records from json lines file to temporary json array file, which replace `output_path` after all records written.
+
+        :param - `file_path` <str>: json lines file path
+        :param - `output_path` <str>: output json array file path
+        :param - `compression` <str>: input compression, `gzip`, `zstd`, None or `infer` from file extension, default=`infer`
+        '''
+        Files_Actions.__write_json_array(
+            records=Files_Actions.iterJsonl(file_path=file_path, encoding=encoding, compression=compression), 
+            output_path=output_path, 
+            indent=indent, 
+            ensure_ascii=ensure_ascii, 
+            encoding=encoding
+        )
+
+    @staticmethod
+    def __parquet_parts(dataset_path: str)-> list[str]:
+        '''sorted part files of parquet dataset folder, part name start with write time'''
+        if pq is None:
+            raise ImportError('parquet format require "pyarrow", pip install pyarrow')
+        if os.path.isfile(dataset_path):
+            return [dataset_path]
+        if not os.path.isdir(dataset_path):
+            raise ValueError(f'can\'t find dataset path: {dataset_path}')
+        return sorted(
+            os.path.join(dataset_path, name) for name in os.listdir(dataset_path) 
+            if name.startswith('part-') and name.endswith('.parquet')
+        )
+
+    @staticmethod
+    def toParquet(
+            output_data: dict| list[dict]| pd.DataFrame, 
+            output_path: str, 
+            append: bool=True, 
+            compression: str='snappy'
+        )-> str:
+        '''Write dictionary to Parquet dataset folder
+
+        each call write one part file into `output_path` folder through pandas / pyarrow, 
+        part file written to hidden temp name then rename, reader never see half written part.
+
+        :param - `output_data` <dict| list[dict]| DataFrame>: output_data a dict, list dict or DataFrame
+        :param - `output_path` <str>: dataset folder path, create if not exist
+        :param - `append` <bool>: passing `False` to remove exist part files before write, default is True
+        :param - `compression` <str>: parquet compression codec `snappy`, `gzip`, `zstd` or None, default=`snappy`
+        :return - <str>: written part file path
+        '''
+        if pq is None:
+            raise ImportError('parquet format require "pyarrow", pip install pyarrow')
+        if isinstance(output_data, dict):
+            output_data = [output_data]
+        df = output_data if isinstance(output_data, pd.DataFrame) else pd.DataFrame(output_data)
+
+        os.makedirs(output_path, exist_ok=True)
+        if not append:
+            for part_path in Files_Actions.__parquet_parts(output_path):
+                os.remove(part_path)
+
+        part_name = f'part-{time.time_ns()}-{os.getpid()}.parquet'
+        tmp_path = os.path.join(output_path, f'.{part_name}.tmp')
+        part_path = os.path.join(output_path, part_name)
+        df.to_parquet(tmp_path, engine='pyarrow', compression=compression, index=False)
+        os.replace(tmp_path, part_path)
+        return part_path
+
+    @staticmethod
+    def iterParquet(
+            dataset_path: str, 
+            columns: list[str]=None, 
+            chunk_size: int=None, 
+            as_dataframe: bool=False, 
+            batch_size: int=65536
+        ):
+        '''Iterate Parquet dataset folder or file
+
+        read part files in write order batch by batch, only `columns` read from disk.
+
+        :param - `dataset_path` <str>: dataset folder written by `toParquet()` or single parquet file
+        :param - `columns` <list[str]>: only read these columns, column not in part file skipped, default read all
+        :param - `chunk_size` <int>: yield list[dict] with `chunk_size` records instead of single record
+        :param - `as_dataframe` <bool>: yield pandas DataFrame with `chunk_size` rows, default=False
+        :param - `batch_size` <int>: rows read from file each time, default=65536
+        '''
+        def iter_batches(read_size: int):
+            for part_path in Files_Actions.__parquet_parts(dataset_path):
+                part_file = pq.ParquetFile(part_path)
+                part_columns = None if columns is None else [c for c in columns if c in part_file.schema_arrow.names]
+                for batch in part_file.iter_batches(batch_size=read_size, columns=part_columns):
+                    if batch.num_rows:
+                        yield batch
+
+        if as_dataframe:
+            # convert batch by batch with arrow, regroup to `chunk_size` rows across part files
+            frame_size = chunk_size or batch_size
+            frames, rows = [], 0
+            for batch in iter_batches(frame_size):
+                frames.append(batch.to_pandas())
+                rows += batch.num_rows
+                while rows >= frame_size:
+                    frame = frames[0] if len(frames) == 1 else pd.concat(frames, ignore_index=True)
+                    yield frame.iloc[:frame_size].reset_index(drop=True)
+                    frames, rows = [frame.iloc[frame_size:]], rows - frame_size
+            if rows:
+                frame = frames[0] if len(frames) == 1 else pd.concat(frames, ignore_index=True)
+                yield frame.reset_index(drop=True)
+            return
+
+        records = (record for batch in iter_batches(batch_size) for record in batch.to_pylist())
+        if chunk_size:
+            yield from DataProcess.chunk_data(records, chunk_size=chunk_size)
+        else:
+            yield from records
+
+    @staticmethod
+    def readParquet(dataset_path: str, columns: list[str]=None, as_dataframe: bool=False)-> list[dict]| pd.DataFrame:
+        '''Read Parquet dataset folder or file
+
+        :param - `dataset_path` <str>: dataset folder written by `toParquet()` or single parquet file
+        :param - `columns` <list[str]>: only read these columns, default read all
+        :param - `as_dataframe` <bool>: return pandas DataFrame instead of list[dict], default=False
+        '''
+        if not as_dataframe:
+            return list(Files_Actions.iterParquet(dataset_path=dataset_path, columns=columns))
+
+        # read each part as arrow table, part may miss some `columns` when schema changed between appends
+        frames = []
+        for part_path in Files_Actions.__parquet_parts(dataset_path):
+            part_columns = None if columns is None else [c for c in columns if c in pq.read_schema(part_path).names]
+            frames.append(pq.read_table(part_path, columns=part_columns).to_pandas())
+        if not frames:
+            return pd.DataFrame(columns=columns)
+        return frames[0] if len(frames) == 1 else pd.concat(frames, ignore_index=True)
 
     @staticmethod
     def loadPickle(filepath: str)-> object:
@@ -637,17 +2410,514 @@ class Files_Actions:
         print(f'Finish saving pickles: {filepath}')
 
 
+class JsonlIndexStore:
+    def __init__(
+            self, 
+            file_path: str, 
+            key: str='id', 
+            index_path: str=None, 
+            ensure_ascii: bool=False, 
+            encoding: str='utf-8'
+        )-> None:
+        '''Offset Indexed Json Lines Store
+
+        keep sidecar index file map record `key` to byte offset of json lines file, `get()` read single record 
+        through mmap without loading whole file. index append incrementally when `append()` records, 
+        records appended by other writer indexed on `refresh()` or next `append()`. duplicate key keep the last record,
+        record with list or dict key not indexed.
+
+        :param - `file_path` <str>: uncompressed json lines file, create if not exist
+        :param - `key` <str>: record key to index, record without key not indexed, default="id"
+        :param - `index_path` <str>: sidecar index file path, default=`file_path` + ".idx", 
+            rebuild when data file replaced or indexed records changed
+        '''
+        self.file_path = file_path
+        self.key = key
+        self.index_path = index_path or file_path + '.idx'
+        self.ensure_ascii = ensure_ascii
+        self.encoding = encoding
+        self.__index = dict()
+        self.__indexed_size = 0
+        self.__file = None
+        self.__mmap = None
+        self.__lock = threading.Lock()
+        if not os.path.exists(file_path):
+            open(file_path, 'ab').close()
+        self.__load_index()
+        self.refresh()
+
+    def __file_identity(self)-> dict:
+        '''data file device and inode, write as first line of sidecar index'''
+        stat = os.stat(self.file_path)
+        return {'device': stat.st_dev, 'inode': stat.st_ino}
+
+    def __check_entry(self, entry: list)-> bool:
+        '''indexed line still a complete record with same key'''
+        key, offset, length = entry
+        with open(self.file_path, 'rb') as f:
+            f.seek(offset)
+            line = f.read(length)
+        if not line.endswith(b'\n'):
+            return False
+        if key is None:
+            return True
+        try:
+            record = json.loads(line.decode(self.encoding))
+        except ValueError:
+            return False
+        return isinstance(record, dict) and record.get(self.key) == key
+
+    def __load_index(self)-> None:
+        '''load sidecar index, rebuild when data file replaced, truncated or rewritten'''
+        self.__index, self.__indexed_size = dict(), 0
+        identity, first_entry, last_entry = None, None, None
+        if os.path.isfile(self.index_path):
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    if not line.endswith('\n'):
+                        # partial written entry, data still covered by tail scan
+                        break
+                    entry = json.loads(line)
+                    if isinstance(entry, dict):
+                        identity = entry
+                        continue
+                    key, offset, length = entry
+                    if key is not None:
+                        self.__index[key] = (offset, length)
+                        first_entry = first_entry or entry
+                        last_entry = entry
+                    self.__indexed_size = offset + length
+
+        # same file and indexed records still in place, otherwise offsets are stale
+        valid = (
+            identity == self.__file_identity()
+            and self.__indexed_size <= os.path.getsize(self.file_path)
+            and all(self.__check_entry(e) for e in [first_entry, last_entry] if e)
+        )
+        if not valid:
+            self.rebuild()
+
+    def __write_index(self, entries: list[list], mode: str='a')-> None:
+        with open(self.index_path, mode, encoding='utf-8') as f:
+            f.write(''.join(json.dumps(e, ensure_ascii=False) + '\n' for e in entries))
+        for key, offset, length in entries:
+            if key is not None:
+                self.__index[key] = (offset, length)
+            self.__indexed_size = offset + length
+
+    def __scan(self, truncate_partial: bool=False)-> int:
+        '''index complete lines after indexed size, blank lines cover by entry without key'''
+        entries = list()
+        with open(self.file_path, 'rb') as f:
+            f.seek(self.__indexed_size)
+            offset = gap_start = self.__indexed_size
+            for line in f:
+                if not line.endswith(b'\n'):
+                    break
+                if line.strip():
+                    if gap_start < offset:
+                        entries.append([None, gap_start, offset - gap_start])
+                    record = json.loads(line.decode(self.encoding))
+                    key = record.get(self.key) if isinstance(record, dict) else None
+                    # list or dict key not hashable, keep offset but not indexed
+                    entries.append([None if isinstance(key, (list, dict)) else key, offset, len(line)])
+                    gap_start = offset + len(line)
+                offset += len(line)
+            if gap_start < offset:
+                entries.append([None, gap_start, offset - gap_start])
+        if entries:
+            self.__write_index(entries)
+
+        if truncate_partial and os.path.getsize(self.file_path) > self.__indexed_size:
+            self.__close_mmap()
+            with open(self.file_path, 'r+b') as f:
+                f.truncate(self.__indexed_size)
+        return sum(1 for e in entries if e[0] is not None)
+
+    def refresh(self, truncate_partial: bool=False)-> int:
+        '''Refresh
+
+        index complete lines appended after indexed size, return number of new indexed records
+
+        :param - `truncate_partial` <bool>: drop incomplete last line left by crashed writer, default=False
+        '''
+        with self.__lock:
+            return self.__scan(truncate_partial=truncate_partial)
+
+    def rebuild(self)-> int:
+        '''Rebuild
+
+        drop sidecar index and index whole json lines file again, return number of indexed records
+        '''
+        with self.__lock:
+            self.__close_mmap()
+            self.__index, self.__indexed_size = dict(), 0
+            with open(self.index_path, 'w', encoding='utf-8') as f:
+                f.write(json.dumps(self.__file_identity()) + '\n')
+        return self.refresh()
+
+    def append(self, output_data: dict| list[dict])-> None:
+        '''Append records
+
+        append records to end of json lines file and index new records, 
+        records appended by other writer indexed before append.
+
+        :param - `output_data` <dict| list[dict]>: output_data a dict or list dict
+        '''
+        if isinstance(output_data, dict):
+            output_data = [output_data]
+        if any(isinstance(data.get(self.key), (list, dict)) for data in output_data):
+            raise TypeError(f'key "{self.key}" value must be hashable, got list or dict')
+
+        entries = list()
+        with self.__lock:
+            if os.path.getsize(self.file_path) != self.__indexed_size:
+                self.__scan()
+            if os.path.getsize(self.file_path) != self.__indexed_size:
+                raise ValueError(
+                    f'json lines file end with incomplete line at offset {self.__indexed_size}, '
+                    f'call refresh(truncate_partial=True) to drop it: {self.file_path}'
+                )
+            with open(self.file_path, 'ab') as f:
+                offset = f.tell()
+                for data in output_data:
+                    line = (json.dumps(data, ensure_ascii=self.ensure_ascii) + '\n').encode(self.encoding)
+                    f.write(line)
+                    entries.append([data.get(self.key), offset, len(line)])
+                    offset += len(line)
+                f.flush()
+            self.__write_index(entries)
+
+    def __read(self, offset: int, length: int)-> bytes:
+        '''read bytes with mmap, remap when file grow over mapped size'''
+        if self.__mmap is None or offset + length > len(self.__mmap):
+            self.__close_mmap()
+            self.__file = open(self.file_path, 'rb')
+            self.__mmap = mmap.mmap(self.__file.fileno(), 0, access=mmap.ACCESS_READ)
+        return self.__mmap[offset: offset + length]
+
+    def get(self, key: object, default: object=None)-> dict:
+        '''Get record by key
+
+        :param - `key` <object>: value of indexed `key`
+        :param - `default` <object>: return when key not found, default=None
+        '''
+        with self.__lock:
+            position = self.__index.get(key)
+            if position is None:
+                return default
+            return json.loads(self.__read(*position).decode(self.encoding))
+
+    def get_many(self, keys: list)-> list[dict]:
+        '''Get records by list keys, read in file order, key not found skipped
+
+        :param - `keys` <list>: values of indexed `key`
+        '''
+        with self.__lock:
+            positions = sorted(self.__index[k] for k in set(keys) if k in self.__index)
+            return [json.loads(self.__read(*p).decode(self.encoding)) for p in positions]
+
+    def keys(self)-> list:
+        return list(self.__index.keys())
+
+    def __contains__(self, key: object)-> bool:
+        return key in self.__index
+
+    def __len__(self)-> int:
+        return len(self.__index)
+
+    def __close_mmap(self)-> None:
+        if self.__mmap is not None:
+            self.__mmap.close()
+            self.__file.close()
+        self.__mmap, self.__file = None, None
+
+    def close(self)-> None:
+        '''Close mmap and data file'''
+        with self.__lock:
+            self.__close_mmap()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, exc_traceback):
+        self.close()
+
+    def __repr__(self) -> str:
+        rep = f'JsonlIndexStore(file_path={self.file_path!r}, key={self.key!r})'
+        return rep
+
+
+class ShardedFileWriter:
+    log = LoggingSet.get_logger(__name__)
+
+    def __init__(
+            self,
+            output_dir: str,
+            prefix: str='shard',
+            compression: str=None,
+            max_bytes: int=128 * 1024 * 1024,
+            max_records: int=None,
+            max_seconds: float=None,
+            manifest_name: str='_manifest.jsonl',
+            ensure_ascii: bool=False,
+            encoding: str='utf-8'
+        )-> None:
+        '''Sharded Json Lines Writer
+
+        write records into json lines shard `{prefix}-{host}-{pid}-{seq}.jsonl`, each process only write its own shards,
+        shard file kept open until roll over when reach `max_bytes`, `max_records` or opened `max_seconds`.
+        writing shard named with ".inprogress" suffix, rename and append to manifest file when finished,
+        downstream loader only pick up shards listed in manifest.
+
+        :param - `output_dir` <str>: shards and manifest folder, create if not exist
+        :param - `prefix` <str>: shard file name prefix, default="shard"
+        :param - `compression` <str>: shard compression `gzip`, `zstd` or None, default=None
+        :param - `max_bytes` <int>: roll over before shard uncompressed json lines bytes over `max_bytes`, default=128MB
+        :param - `max_records` <int>: roll over when shard records reach `max_records`, default no limit
+        :param - `max_seconds` <float>: roll over on write when shard opened over `max_seconds`, default no limit
+        :param - `manifest_name` <str>: manifest json lines file name in `output_dir`, default="_manifest.jsonl"
+        '''
+        if compression not in [None, 'gzip', 'zstd']:
+            raise ValueError('args "compression" only accept [None|"gzip"|"zstd"]')
+        os.makedirs(output_dir, exist_ok=True)
+        self.output_dir = output_dir
+        self.prefix = prefix
+        self.compression = compression
+        self.max_bytes = max_bytes
+        self.max_records = max_records
+        self.max_seconds = max_seconds
+        self.manifest_path = os.path.join(output_dir, manifest_name)
+        self.ensure_ascii = ensure_ascii
+        self.encoding = encoding
+        self.finished = list()
+        self.__host = re.sub(r'[^\w.]', '_', socket.gethostname())
+        self.__lock = threading.Lock()
+        self.__closed = False
+        self.__shard = None
+        self.__handle = None
+        self.__pid = os.getpid()
+        self.__seq = 0
+
+    @property
+    def suffix(self)-> str:
+        return '.jsonl' + {None: '', 'gzip': '.gz', 'zstd': '.zst'}[self.compression]
+
+    def __open_shard(self)-> None:
+        '''create next sequence shard, skip name already exist, keep file handle until rotate'''
+        while True:
+            shard_name = f'{self.prefix}-{self.__host}-{self.__pid}-{self.__seq:06d}{self.suffix}'
+            shard_path = os.path.join(self.output_dir, shard_name)
+            self.__seq += 1
+            if os.path.exists(shard_path):
+                continue
+            try:
+                os.close(os.open(shard_path + '.inprogress', os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+            except FileExistsError:
+                continue
+            break
+        self.__handle = Files_Actions._open_text(shard_path + '.inprogress', 'w', encoding=self.encoding, compression=self.compression)
+        self.__shard = {
+            'shard': shard_name,
+            'path': shard_path,
+            'records': 0,
+            'bytes': 0,
+            'host': self.__host,
+            'pid': self.__pid,
+            'created_time': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            'opened': time.monotonic()
+        }
+
+    def __detach_after_fork(self)-> None:
+        '''forked child never touch parent's shard, redirect inherited handle to devnull before drop it'''
+        if self.__handle is not None:
+            try:
+                devnull = os.open(os.devnull, os.O_WRONLY)
+                os.dup2(devnull, self.__handle.fileno())
+                os.close(devnull)
+            except (OSError, ValueError):
+                pass
+        self.__pid, self.__seq, self.__shard, self.__handle = os.getpid(), 0, None, None
+
+    def __finish_shard(self)-> dict:
+        '''close shard, rename to final name and append to manifest, remove shard without records'''
+        shard, self.__shard = self.__shard, None
+        self.__handle.close()
+        self.__handle = None
+        inprogress_path = shard.pop('path') + '.inprogress'
+        shard.pop('opened')
+        if not shard['records']:
+            os.remove(inprogress_path)
+            return None
+
+        final_path = os.path.join(self.output_dir, shard['shard'])
+        os.replace(inprogress_path, final_path)
+        shard['bytes'] = os.path.getsize(final_path)
+        shard['finished_time'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        with open(self.manifest_path, 'a', encoding='utf-8') as f:
+            if fcntl:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                f.write(json.dumps(shard) + '\n')
+                f.flush()
+                os.fsync(f.fileno())
+            finally:
+                if fcntl:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+        self.finished.append(shard)
+        return shard
+
+    def __need_rotate(self, line_bytes: int)-> bool:
+        '''shard with records can not take next line'''
+        shard = self.__shard
+        return shard['records'] > 0 and (
+            shard['bytes'] + line_bytes > self.max_bytes
+            or (self.max_records is not None and shard['records'] >= self.max_records)
+            or (self.max_seconds is not None and time.monotonic() - shard['opened'] >= self.max_seconds)
+        )
+
+    def write(self, output_data: dict| list[dict])-> None:
+        '''Write records
+
+        append records to current shard record by record, roll over to next shard before the record 
+        which make shard over `max_bytes` (uncompressed json lines bytes) or `max_records`, 
+        single record larger than `max_bytes` write into its own shard.
+
+        :param - `output_data` <dict| list[dict]>: output_data a dict or list dict
+        '''
+        if self.__closed:
+            raise RuntimeError('ShardedFileWriter already closed')
+        output_data = [output_data] if isinstance(output_data, dict) else output_data
+        with self.__lock:
+            if self.__pid != os.getpid():
+                self.__detach_after_fork()
+            for data in output_data:
+                line = json.dumps(data, ensure_ascii=self.ensure_ascii) + '\n'
+                line_bytes = len(line.encode(self.encoding))
+                if self.__shard is not None and self.__need_rotate(line_bytes):
+                    self.__finish_shard()
+                if self.__shard is None:
+                    self.__open_shard()
+                self.__handle.write(line)
+                self.__shard['records'] += 1
+                self.__shard['bytes'] += line_bytes
+
+    def rotate(self)-> dict:
+        '''Rotate
+
+        finish current shard now, return finished shard info or None if nothing written
+        '''
+        with self.__lock:
+            if self.__pid != os.getpid():
+                self.__detach_after_fork()
+            if self.__shard is None:
+                return None
+            return self.__finish_shard()
+
+    def close(self)-> list[dict]:
+        '''Close
+
+        finish current shard and return list of shard info finished by this writer
+        '''
+        if not self.__closed:
+            self.rotate()
+            self.__closed = True
+            Message.splitline(f'[ShardedFileWriter] close writer <{self.output_dir}>', 
+                f'finished shards: {len(self.finished)}, records: {sum(s["records"] for s in self.finished)}')
+        return self.finished
+
+    @staticmethod
+    def read_manifest(output_dir: str, manifest_name: str='_manifest.jsonl')-> list[dict]:
+        '''Read Manifest
+
+        list finished shards info of `output_dir`, shard file path at `os.path.join(output_dir, info["shard"])`
+
+        :param - `output_dir` <str>: shards and manifest folder
+        :param - `manifest_name` <str>: manifest json lines file name in `output_dir`, default="_manifest.jsonl"
+        '''
+        manifest_path = os.path.join(output_dir, manifest_name)
+        if not os.path.isfile(manifest_path):
+            return list()
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            if fcntl:
+                fcntl.flock(f, fcntl.LOCK_SH)
+            try:
+                return [json.loads(line) for line in f if line.strip()]
+            finally:
+                if fcntl:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, exc_traceback):
+        self.close()
+
+    def __repr__(self) -> str:
+        rep = f'ShardedFileWriter(output_dir={self.output_dir!r}, prefix={self.prefix!r}, compression={self.compression!r})'
+        return rep
+
+
 class Solr_Actions:
-    def __init__(self, solr_url: str)-> None:
+    log = LoggingSet.get_logger(__name__)
+
+    def __init__(
+            self, 
+            solr_url: str, 
+            timeout: float=10, 
+            batch_size: int=1000, 
+            commit_within: int=None, 
+            soft_commit: bool=False,
+            pool_maxsize: int=10,
+            max_retries: int=3,
+            retry_backoff: float=0.5
+        )-> None:
         '''Solr_Actions.init Object
         
         :param - `solr_url` <str>: passing solr url 
             example: http://localhost:8983/solr/
+        :param - `timeout` <float>: request timeout seconds, default=10
+        :param - `batch_size` <int>: documents in each add request, default=1000
+        :param - `commit_within` <int>: let solr commit within `commit_within` milliseconds instead of commit after each call, default=None
+        :param - `soft_commit` <bool>: commit with soft commit (visible without flush to disk) after each call, default=False
+        :param - `pool_maxsize` <int>: keep-alive connections kept in session pool, default=10
+        :param - `max_retries` <int>: retry request on connection error, timeout and 5xx response, default=3
+        :param - `retry_backoff` <float>: retry backoff factor seconds, default=0.5
             
         see document on: https://pypi.org/project/pysolr/
         '''
         self.solr_url = solr_url
-        self.solr_engine = pysolr.Solr(url=self.solr_url, timeout=10)
+        self.batch_size = batch_size
+        self.commit_within = commit_within
+        self.soft_commit = soft_commit
+        self.session = Solr_Actions.init_session(pool_maxsize=pool_maxsize, max_retries=max_retries, retry_backoff=retry_backoff)
+        self.solr_engine = pysolr.Solr(url=self.solr_url, timeout=timeout)
+        # pysolr<3.10 not accept `session` args, but use `self.session` when set
+        self.solr_engine.session = self.session
+
+    @staticmethod
+    def init_session(pool_maxsize: int=10, max_retries: int=3, retry_backoff: float=0.5)-> requests.Session:
+        '''Init requests Session
+
+        keep-alive connection pool, retry on connection error, timeout and 5xx response, 
+        add by unique key is idempotent so POST retried as well.
+
+        :param - `pool_maxsize` <int>: keep-alive connections kept in session pool, default=10
+        :param - `max_retries` <int>: retry times, default=3
+        :param - `retry_backoff` <float>: retry backoff factor seconds, default=0.5
+        '''
+        retry = Retry(
+                    total=max_retries, 
+                    backoff_factor=retry_backoff, 
+                    status_forcelist=[500, 502, 503, 504], 
+                    allowed_methods=None, 
+                    raise_on_status=False
+                )
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_maxsize, max_retries=retry)
+        session = requests.Session()
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        return session
 
     def check_connection(self):
         '''Check Connection
@@ -667,42 +2937,229 @@ class Solr_Actions:
         else:
             return True
 
-    def create(self, create_data: dict| list[dict])-> None:
+    def __commit(self, commit: bool, deleted: bool=False)-> None:
+        '''commit after write call, skip when solr commit by `commit_within`, pysolr delete not support commitWithin use soft commit'''
+        if not commit:
+            return
+        if self.commit_within is None or deleted:
+            self.solr_engine.commit(softCommit=self.soft_commit or self.commit_within is not None)
+
+    def flush(self, soft_commit: bool=False)-> None:
+        '''Flush
+
+        explicit commit for all pending documents, hard commit by default
+
+        :param - `soft_commit` <bool>: soft commit instead of hard commit, default=False
+        '''
+        self.solr_engine.commit(softCommit=soft_commit)
+
+    def create(self, create_data: dict| list[dict], batch_size: int=None, commit: bool=True)-> None:
         '''Insert data to solr core
         
+        send documents with `batch_size` documents each add request, commit once after all batches,
+        or let solr commit within `commit_within` milliseconds.
+
         :param - `create_data`<list[dict]>: passing list dictionary object to insert into solr
+        :param - `batch_size` <int>: documents in each add request, default use `self.batch_size`
+        :param - `commit` <bool>: passing `False` to skip commit and call `flush()` later, default=True
         '''
         if isinstance(create_data, dict):
             create_data = [create_data]
             
         # action
-        self.solr_engine.add(docs=create_data)
-        self.solr_engine.commit()
+        for batch in DataProcess.chunk_data(create_data, chunk_size=batch_size or self.batch_size):
+            self.solr_engine.add(docs=batch, commit=False, commitWithin=self.commit_within)
+        self.__commit(commit=commit)
         # final
         Message.splitline('Write to Solr', f'Total Insert: {len(create_data)}')
         
-    def retrieve(self, query_sytax: str)-> list:
+    def partial_update(
+            self, 
+            update_data: dict| list[dict], 
+            modifiers: dict=None, 
+            unique_key: str='id', 
+            batch_size: int=None, 
+            commit: bool=True
+        )-> None:
+        '''Atomic partial update solr data
+
+        only send changed fields with atomic update modifier instead of whole document, 
+        send with `batch_size` documents each add request and commit like `create()`.
+
+        :param - `update_data` <dict| list[dict]>: unique key and changed fields of each document
+            see example:
+                update_data = [{'id': '1', 'status': 'done', 'view_count': 1}, {...}]
+        :param - `modifiers` <dict>: field to modifier `set`, `add`, `add-distinct`, `inc`, `remove` or `removeregex`, 
+            field not in modifiers use `set`
+            see example:
+                modifiers = {'view_count': 'inc'}
+        :param - `unique_key` <str>: unique key field of solr core, default="id"
+        :param - `batch_size` <int>: documents in each add request, default use `self.batch_size`
+        :param - `commit` <bool>: passing `False` to skip commit and call `flush()` later, default=True
+        '''
+        if isinstance(update_data, dict):
+            update_data = [update_data]
+        modifiers = modifiers or dict()
+        invalid = set(modifiers.values()) - {'set', 'add', 'add-distinct', 'inc', 'remove', 'removeregex'}
+        if invalid:
+            raise ValueError(f'unsupported atomic update modifiers: {invalid}')
+        if any(unique_key not in doc for doc in update_data):
+            raise ValueError(f'update data missing unique key: "{unique_key}"')
+
+        for batch in DataProcess.chunk_data(update_data, chunk_size=batch_size or self.batch_size):
+            field_updates = {field: modifiers.get(field, 'set') for doc in batch for field in doc if field != unique_key}
+            self.solr_engine.add(docs=batch, fieldUpdates=field_updates, commit=False, commitWithin=self.commit_within)
+        self.__commit(commit=commit)
+        Message.splitline('Partial Update Solr', f'Total Update: {len(update_data)}')
+
+    def __add_batch(self, batch: list[dict])-> tuple[int, float, bool]:
+        '''add one batch, return documents, latency seconds and success'''
+        start_time = time.perf_counter()
+        try:
+            self.solr_engine.add(docs=batch, commit=False, commitWithin=self.commit_within)
+            success = True
+        except Exception as e:
+            success = False
+            errmsg = traceback.format_exc()
+            Solr_Actions.log.error(errmsg)
+        return len(batch), time.perf_counter() - start_time, success
+
+    def parallel_create(
+            self, 
+            create_data: list[dict], 
+            batch_size: int=None, 
+            max_workers: int=4, 
+            commit: bool=True
+        )-> dict:
+        '''Parallel insert data to solr core
+
+        split documents into batches and send add request concurrently from thread pool, 
+        all threads share keep-alive connections of `self.session`, failed request retried by session.
+        set `pool_maxsize` not less than `max_workers` to keep all connections alive.
+
+        :param - `create_data`<list[dict]>: passing list dictionary object to insert into solr
+        :param - `batch_size` <int>: documents in each add request, default use `self.batch_size`
+        :param - `max_workers` <int>: concurrent add requests, default=4
+        :param - `commit` <bool>: passing `False` to skip commit and call `flush()` later, default=True
+        :return - <dict>: success / error documents, batch count and batch latency seconds (avg, p95, max)
+        '''
+        if isinstance(create_data, dict):
+            create_data = [create_data]
+
+        statistic = {'success': 0, 'error': 0, 'batch': 0}
+        latencies = list()
+        batches = DataProcess.chunk_data(create_data, chunk_size=batch_size or self.batch_size)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for docs, latency, success in executor.map(self.__add_batch, batches):
+                statistic['success' if success else 'error'] += docs
+                statistic['batch'] += 1
+                latencies.append(latency)
+        self.__commit(commit=commit)
+
+        latencies.sort()
+        statistic['latency_avg'] = sum(latencies) / len(latencies) if latencies else 0
+        statistic['latency_p95'] = latencies[math.ceil(len(latencies) * 0.95) - 1] if latencies else 0
+        statistic['latency_max'] = latencies[-1] if latencies else 0
+        Message.splitline('Parallel Write to Solr', '\n'.join(f'{k}: {v}' for k, v in statistic.items()))
+        return statistic
+
+    def iter_retrieve(
+            self, 
+            query_syntax: str='*:*', 
+            fl: str| list[str]=None, 
+            fq: str| list[str]=None, 
+            sort: str=None, 
+            rows: int=1000, 
+            unique_key: str='id', 
+            chunk_size: int=None
+        ):
+        '''Iterate solr data
+
+        deep paging with `cursorMark`, each request fetch `rows` documents after previous page, 
+        yield document one by one or list[dict] with `chunk_size` documents.
+
+        :param - `query_syntax` <str>: solr query syntax to query data, default="*:*"
+        :param - `fl` <str| list[str]>: field list to return, default return all stored fields
+        :param - `fq` <str| list[str]>: filter query
+        :param - `sort` <str>: sort clause, `unique_key` add as tie breaker if not in sort, default="`unique_key` asc"
+        :param - `rows` <int>: documents in each page request, default=1000
+        :param - `unique_key` <str>: unique key field of solr core, default="id"
+        :param - `chunk_size` <int>: yield list[dict] with `chunk_size` documents instead of single document
+        '''
+        sort_fields = [clause.split()[0] for clause in sort.split(',') if clause.strip()] if sort else []
+        if unique_key not in sort_fields:
+            sort = f'{sort}, {unique_key} asc' if sort else f'{unique_key} asc'
+        params = {'rows': rows, 'sort': sort}
+        if fl:
+            params['fl'] = fl if isinstance(fl, str) else ','.join(fl)
+        if fq:
+            params['fq'] = fq
+
+        def iter_docs():
+            cursor_mark = '*'
+            while True:
+                results = self.solr_engine.search(q=query_syntax, cursorMark=cursor_mark, **params)
+                yield from results.docs
+                # cursor not move means all documents fetched
+                if not results.docs or results.nextCursorMark in [None, cursor_mark]:
+                    break
+                cursor_mark = results.nextCursorMark
+
+        if chunk_size:
+            yield from DataProcess.chunk_data(iter_docs(), chunk_size=chunk_size)
+        else:
+            yield from iter_docs()
+
+    def retrieve(
+            self, 
+            query_sytax: str, 
+            fl: str| list[str]=None, 
+            fq: str| list[str]=None, 
+            sort: str=None, 
+            rows: int=1000, 
+            unique_key: str='id'
+        )-> list:
         '''Query solr data
 
-        passing query syntax text to retrieve data from solr core
+        passing query syntax text to retrieve all matched data from solr core, page with `cursorMark`
 
         :param - query_sytax <str>: solr query syntax to query data
+        :param - `fl` <str| list[str]>: field list to return, default return all stored fields
+        :param - `fq` <str| list[str]>: filter query
+        :param - `sort` <str>: sort clause, `unique_key` add as tie breaker if not in sort
+        :param - `rows` <int>: documents in each page request, default=1000
+        :param - `unique_key` <str>: unique key field of solr core, default="id"
         '''
-        retrieve_result = [doc for doc in self.solr_engine.search(q=query_sytax)]
+        retrieve_result = list(self.iter_retrieve(
+                                query_syntax=query_sytax, 
+                                fl=fl, 
+                                fq=fq, 
+                                sort=sort, 
+                                rows=rows, 
+                                unique_key=unique_key
+                            ))
         Message.splitline('read from Solr', f'Total Fetch: {len(retrieve_result)}')
         return retrieve_result
         
-    def delete(self, id_code: list)-> None:
+    def delete(self, id_code: list, batch_size: int=None, commit: bool=True)-> None:
         '''Delete solr data by id_code
         
         Passing list id to delete from solr core
 
         :param `id_code` <list[str]>: list id_code for record which want to delete from solr
+        :param - `batch_size` <int>: ids in each delete request, default use `self.batch_size`
+        :param - `commit` <bool>: passing `False` to skip commit and call `flush()` later, default=True
         '''
-        self.solr_engine.delete(id=id_code)
-        self.solr_engine.commit()
-        Message.splitline('Delete data', f'delete data id: {id_code} success!')
+        id_code = [id_code] if isinstance(id_code, (str, int)) else id_code
+        for batch in DataProcess.chunk_data(id_code, chunk_size=batch_size or self.batch_size):
+            self.solr_engine.delete(id=batch, commit=False)
+        self.__commit(commit=commit, deleted=True)
+        Message.splitline('Delete data', f'delete data count: {len(id_code)} success!')
     
+    def close(self)-> None:
+        '''Close session and keep-alive connections'''
+        self.session.close()
+
     def __repr__(self) -> str:
         rep = f'Solr_Actions(solr_url={self.solr_url}, solr_engine={self.solr_engine})'
         return rep
@@ -131,6 +131,25 @@ class DataProcess:
         hash_str.update(data_byte)
         return hash_str.hexdigest()
 
+    @staticmethod
+    def chunk_data(datas: list, chunk_size: int):
+        '''chunk data
+        split iterable data into list chunks, each chunk has at most `chunk_size` items
+
+        :param - `datas` <iterable>: data which want to split into chunks
+        :param - `chunk_size` <int>: max items in each chunk
+        '''
+        if not isinstance(chunk_size, int) or chunk_size < 1:
+            raise ValueError('args "chunk_size" only accept int greater than 0')
+        chunk = list()
+        for data in datas:
+            chunk.append(data)
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = list()
+        if chunk:
+            yield chunk
+
 
 class TempDataSet:
     '''temp data set
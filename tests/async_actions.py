@@ -0,0 +1,74 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.crawler_toolkit.output_data import AsyncMsSQL_Actions
+
+import asyncio
+import unittest
+from datetime import datetime
+
+from sqlalchemy.sql import func
+from sqlalchemy import Column
+from sqlalchemy.dialects.mssql import INTEGER, DATETIME, VARCHAR
+from sqlalchemy.orm import declarative_base
+
+db = declarative_base()
+
+class AsyncTestTable(db):
+    """ AsyncTestTable """
+    __tablename__ = "AsyncTestTable"
+    Id   = Column(INTEGER, primary_key=True, autoincrement=True)
+    AccountType = Column(VARCHAR(32), nullable=False)
+    Created_Time = Column(DATETIME, default=func.now())
+
+
+class AsyncMssqlActionTest(unittest.IsolatedAsyncioTestCase):
+    TEST_CONNECTION = 'sqlite+aiosqlite:///develop/async_sqlite.db'
+    create_time = datetime.strptime('2023-04-12 15:00:00','%Y-%m-%d %H:%M:%S')
+
+    async def asyncSetUp(self):
+        self.sql_action = AsyncMsSQL_Actions(connect_info=self.TEST_CONNECTION)
+
+    async def asyncTearDown(self):
+        await self.sql_action.close()
+
+    async def test_1_connection(self):
+        self.assertTrue(await self.sql_action.check_connection(), 'Connection Fail')
+
+    async def test_2_init_database_table(self):
+        await self.sql_action.init_database(AsyncTestTable)
+        table_schema = await self.sql_action.syntax_query('SELECT name FROM sqlite_schema WHERE name = :name', {'name': 'AsyncTestTable'})
+        self.assertEqual(table_schema, [{'name': 'AsyncTestTable'}], 'Table Schema Not Exist')
+
+    async def test_3_create_concurrent(self):
+        insert_tasks = [
+            self.sql_action.create(datas={'AccountType': f'type_{i}', 'Created_Time': self.create_time}, table_model=AsyncTestTable)
+            for i in range(10)
+        ]
+        await asyncio.gather(*insert_tasks)
+        result = await self.sql_action.retrieve(table_model=AsyncTestTable, filter_by_dict={'AccountType': [f'type_{i}' for i in range(10)]})
+        self.assertEqual(len(result), 10, 'create_data concurrent fail')
+
+    async def test_4_iter_retrieve(self):
+        chunks = [c async for c in self.sql_action.iter_retrieve(table_model=AsyncTestTable, chunk_size=4)]
+        self.assertEqual([len(c) for c in chunks], [4, 4, 2], 'iter_retrieve chunk fail')
+
+    async def test_5_update(self):
+        await self.sql_action.update(table_model=AsyncTestTable, data_id=1, update_data={'AccountType': 'Test_Modify'})
+        result = await self.sql_action.retrieve(table_model=AsyncTestTable, filter_by_dict={'Id': 1})
+        self.assertEqual(result[0]['AccountType'], 'Test_Modify', 'update value Fail')
+
+    async def test_6_delete(self):
+        await self.sql_action.delete(table_model=AsyncTestTable, data_id=1)
+        result = await self.sql_action.retrieve(table_model=AsyncTestTable, filter_by_dict={'Id': 1})
+        self.assertEqual(result, [], 'delete record Fail')
+
+    async def test_7_drop_table(self):
+        await self.sql_action.drop_table(table_model=AsyncTestTable)
+        table_schema = await self.sql_action.syntax_query('SELECT name FROM sqlite_schema WHERE name = "AsyncTestTable"')
+        self.assertEqual(table_schema, [], 'Table Schema Exist, Drop Fail')
+
+if __name__ == '__main__':
+    unittest.main()
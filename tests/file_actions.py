@@ -5,7 +5,7 @@ import os
 import sys
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from src.crawler_toolkit.output_data import Files_Actions
+from src.crawler_toolkit.output_data import Files_Actions, ShardedFileWriter, JsonlIndexStore
 
 class FileActionTest(unittest.TestCase):
     filter_by = {
@@ -22,6 +22,7 @@ class FileActionTest(unittest.TestCase):
     if not os.path.exists(test_filefolder):
         os.mkdir(test_filefolder)
     file_name = os.path.join(test_filefolder, 'test.json')
+    jsonl_name = os.path.join(test_filefolder, 'test.jsonl')
     pickle_name = os.path.join(test_filefolder, 'pickle.pkl')
     
     def test_1_check_filterkey(self):
@@ -41,6 +42,19 @@ class FileActionTest(unittest.TestCase):
         result = Files_Actions.readJson(file_path=self.file_name)
         self.assertGreater(len(result), 4)
 
+    def test_4_iterjson(self):
+        result = Files_Actions.iterJson(file_path=self.file_name, chunk_size=1, filter_func=lambda r: r['id'] < 2, buffer_size=16)
+        self.assertEqual(list(result), [[self.multiple_data[0]], [self.multiple_data[1]]], 'Iter Json Fail')
+
+    def test_4_iterjson_split_number(self):
+        split_name = os.path.join(self.test_filefolder, 'split.json')
+        with open(split_name, 'w', encoding='utf-8') as f:
+            f.write('[1e3, 12.5, -3]')
+        for buffer_size in range(1, 16):
+            result = list(Files_Actions.iterJson(file_path=split_name, buffer_size=buffer_size))
+            self.assertEqual(result, [1e3, 12.5, -3], f'Iter Json Split Number Fail, buffer_size={buffer_size}')
+        os.remove(split_name)
+
     def test_4_readjson(self):
         result = Files_Actions.readJson(file_path=self.file_name)
         self.assertGreater(len(result), 0)
@@ -64,6 +78,21 @@ class FileActionTest(unittest.TestCase):
             if r.get('id') in [99, 0]:
                 self.assertEqual(r.get('name'), 'updateName_1', 'Update Fail')
 
+    def test_5_updatejson_upsert(self):
+        upsert_data = [
+            {'filter_by': {'id': 1}, 'update_data': {'name': 'updateName_2'}},
+            {'filter_by': {'id': 77}, 'update_data': {'name': 'upsertName'}}
+            ]
+        statistic = Files_Actions.updateJson(update_data=upsert_data, file_path=self.file_name, upsert=True)
+        self.assertEqual((statistic['matched'], statistic['unmatched'], statistic['upserted']), (1, 1, 1), 'Update Statistic Fail')
+
+        result = Files_Actions.readJson(file_path=self.file_name)
+        self.assertEqual(result[-1], {'id': 77, 'name': 'upsertName'}, 'Upsert Fail')
+
+        os.chmod(self.file_name, 0o644)
+        Files_Actions.updateJson(update_data=upsert_data, file_path=self.file_name)
+        self.assertEqual(os.stat(self.file_name).st_mode & 0o777, 0o644, 'Keep File Permission Fail')
+
     def test_6_loadPickle(self):
         Files_Actions.toPickle(output_data={'cookies': 'asflkasjdinb', 'header': 'google_chrome 111'}, filepath=self.pickle_name)
         self.assertTrue(os.path.exists(self.pickle_name), 'init pickle Fail')
@@ -72,8 +101,109 @@ class FileActionTest(unittest.TestCase):
         result = Files_Actions.loadPickle(filepath=self.pickle_name)
         self.assertEqual(result.get('cookies'), 'asflkasjdinb')
 
+    def test_7_jsonl_append(self):
+        Files_Actions.toJsonl(output_data=self.multiple_data, output_path=self.jsonl_name, append=False)
+        Files_Actions.toJsonl(output_data=self.single_data, output_path=self.jsonl_name)
+        result = Files_Actions.readJsonl(file_path=self.jsonl_name)
+        self.assertEqual(result, self.multiple_data + [self.single_data], 'Jsonl Append Fail')
+
+        chunks = list(Files_Actions.iterJsonl(file_path=self.jsonl_name, chunk_size=2))
+        self.assertEqual([len(c) for c in chunks], [2, 2, 1], 'Jsonl Chunk Fail')
+
+    def test_7_jsonl_convert(self):
+        json_name = os.path.join(self.test_filefolder, 'convert.json')
+        Files_Actions.jsonl2json(file_path=self.jsonl_name, output_path=json_name)
+        Files_Actions.json2jsonl(file_path=json_name, output_path=self.jsonl_name)
+        self.assertEqual(Files_Actions.readJson(file_path=json_name), Files_Actions.readJsonl(file_path=self.jsonl_name))
+        # streamed array keep same layout as json.dump
+        with open(json_name, 'r', encoding='utf-8') as f:
+            self.assertEqual(f.read(), json.dumps(Files_Actions.readJsonl(file_path=self.jsonl_name), indent=4, ensure_ascii=False))
+
+        compressed_name = self.jsonl_name + '.gz'
+        Files_Actions.json2jsonl(file_path=json_name, output_path=compressed_name)
+        Files_Actions.jsonl2json(file_path=compressed_name, output_path=json_name)
+        self.assertEqual(Files_Actions.readJson(file_path=json_name), Files_Actions.readJsonl(file_path=compressed_name), 'Jsonl Convert Compressed Fail')
+        os.remove(compressed_name)
+        os.remove(json_name)
+
+    def test_7_jsonl_compressed(self):
+        for suffix in ['.gz', '.zst']:
+            compressed_name = self.jsonl_name + suffix
+            Files_Actions.toJsonl(output_data=self.multiple_data, output_path=compressed_name, append=False)
+            Files_Actions.toJsonl(output_data=self.single_data, output_path=compressed_name)
+            result = Files_Actions.readJsonl(file_path=compressed_name, columns=['name'])
+            self.assertEqual(result, [{'name': i['name']} for i in self.multiple_data + [self.single_data]], f'Jsonl {suffix} Fail')
+            os.remove(compressed_name)
+
+    def test_7_parquet(self):
+        dataset_path = os.path.join(self.test_filefolder, 'dataset')
+        Files_Actions.toParquet(output_data=self.multiple_data, output_path=dataset_path, append=False)
+        Files_Actions.toParquet(output_data=self.single_data, output_path=dataset_path)
+        result = Files_Actions.readParquet(dataset_path=dataset_path, columns=['id'])
+        self.assertEqual(result, [{'id': i['id']} for i in self.multiple_data + [self.single_data]], 'Parquet Append Fail')
+
+        chunks = list(Files_Actions.iterParquet(dataset_path=dataset_path, chunk_size=3))
+        self.assertEqual([len(c) for c in chunks], [3, 2], 'Parquet Chunk Fail')
+
+        frames = list(Files_Actions.iterParquet(dataset_path=dataset_path, columns=['id'], chunk_size=3, as_dataframe=True))
+        self.assertEqual([len(f) for f in frames], [3, 2], 'Parquet DataFrame Chunk Fail')
+        self.assertEqual([r for f in frames for r in f.to_dict('records')], result, 'Parquet DataFrame Iter Fail')
+        frame = Files_Actions.readParquet(dataset_path=dataset_path, columns=['id'], as_dataframe=True)
+        self.assertEqual(frame.to_dict('records'), result, 'Parquet DataFrame Read Fail')
+        for part_name in os.listdir(dataset_path):
+            os.remove(os.path.join(dataset_path, part_name))
+        os.rmdir(dataset_path)
+
+    def test_7_jsonl_index_store(self):
+        store_name = os.path.join(self.test_filefolder, 'store.jsonl')
+        Files_Actions.toJsonl(output_data=self.multiple_data, output_path=store_name, append=False)
+        with JsonlIndexStore(file_path=store_name, key='id') as store:
+            self.assertEqual(store.get(2), self.multiple_data[2], 'Store Index Exist File Fail')
+            store.append(self.single_data)
+            self.assertEqual(store.get(99), self.single_data, 'Store Append Fail')
+
+        Files_Actions.toJsonl(output_data={'id': 100, 'name': 'other_writer'}, output_path=store_name)
+        with JsonlIndexStore(file_path=store_name, key='id') as store:
+            self.assertEqual(len(store), 6, 'Store Incremental Index Fail')
+            self.assertEqual(store.get(100), {'id': 100, 'name': 'other_writer'}, 'Store Get Fail')
+
+        with open(store_name, 'a', encoding='utf-8') as f:
+            f.write('\n{"id": [1]}\n\n{"id": 101')
+        with JsonlIndexStore(file_path=store_name, key='id') as store:
+            with self.assertRaises(ValueError):
+                store.append({'id': 102})
+            store.refresh(truncate_partial=True)
+            store.append({'id': 102})
+            self.assertEqual((len(store), store.get(102)), (7, {'id': 102}), 'Store Blank Line Or Partial Tail Fail')
+
+        regenerate_data = [{'id': i, 'name': f'regenerate_{i}'} for i in range(10)]
+        Files_Actions.toJsonl(output_data=regenerate_data, output_path=store_name, append=False)
+        with JsonlIndexStore(file_path=store_name, key='id') as store:
+            self.assertEqual((len(store), store.get(3)), (10, regenerate_data[3]), 'Store Stale Index Fail')
+        os.remove(store_name)
+        os.remove(store_name + '.idx')
+
+    def test_7_sharded_writer(self):
+        shard_folder = os.path.join(self.test_filefolder, 'shards')
+        with ShardedFileWriter(output_dir=shard_folder, max_records=3) as writer:
+            writer.write(self.multiple_data)
+            writer.write(self.single_data)
+        manifest = ShardedFileWriter.read_manifest(output_dir=shard_folder)
+        self.assertEqual([i['records'] for i in manifest], [3, 2], 'Shard Rotate Fail')
+
+        result = [r for i in manifest for r in Files_Actions.readJsonl(file_path=os.path.join(shard_folder, i['shard']))]
+        self.assertEqual(result, self.multiple_data + [self.single_data], 'Shard Records Fail')
+
+        with ShardedFileWriter(output_dir=shard_folder, prefix='size', max_bytes=64) as writer:
+            writer.write(self.multiple_data * 2)
+        self.assertEqual([i['records'] for i in writer.finished], [2, 2, 2, 2], 'Shard Split By Size Fail')
+        for file_name in os.listdir(shard_folder):
+            os.remove(os.path.join(shard_folder, file_name))
+        os.rmdir(shard_folder)
+
     def test_8_remove_folder(self):
         os.remove(self.file_name)
+        os.remove(self.jsonl_name)
         os.remove(self.pickle_name)
         os.rmdir(self.test_filefolder)
 
@@ -3,9 +3,9 @@ import sys
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from src.crawler_toolkit.output_data import MongoDB_Actions
-
+from src.crawler_toolkit.output_data import MongoDB_Actions, BufferedMongoWriter, AsyncMongoDB_Actions
 
+import asyncio
 import unittest
 
 class MongoDBActionsTest(unittest.TestCase):
@@ -24,11 +24,45 @@ class MongoDBActionsTest(unittest.TestCase):
     def test_1_check_connection(self):
         self.assertTrue(self.mongo_actions.check_connection(), 'Connection Fail')
 
+    def test_1_shared_client(self):
+        other_actions = MongoDB_Actions(connect_info=self.MONGODB_CONN_INFO)
+        self.assertIs(other_actions.mongoDB_client, self.mongo_actions.mongoDB_client, 'Client Not Shared')
+
+        own_actions = MongoDB_Actions(connect_info=self.MONGODB_CONN_INFO, shared_client=False)
+        self.assertIsNot(own_actions.mongoDB_client, self.mongo_actions.mongoDB_client, 'Client Should Not Shared')
+        own_actions.close()
+
+    @unittest.skipUnless(hasattr(os, 'fork'), 'fork not supported')
+    def test_1_client_after_fork(self):
+        parent_client = self.mongo_actions.mongoDB_client
+        pid = os.fork()
+        if pid == 0:
+            # child exit code 0 only when client re-created for child process
+            os._exit(0 if self.mongo_actions.mongoDB_client is not parent_client else 1)
+        _, status = os.waitpid(pid, 0)
+        self.assertEqual(os.WEXITSTATUS(status), 0, 'Child Process Use Parent Client')
+        self.assertIs(self.mongo_actions.mongoDB_client, parent_client, 'Parent Client Changed')
+
     def test_2_create(self):
         self.mongo_actions.create(create_data=self.fake_data, collection_name=self.collection_name)
         result = self.mongo_actions.retrieve(collection_name=self.collection_name, query_syntax={})
         self.assertEqual(result, self.fake_data, 'Create Data Fail')
-    
+
+    def test_2_create_bulk(self):
+        bulk_data = self.fake_data + [{'_id': 10, 'name': 'bulk_test', 'age': 100}]
+        statistic = self.mongo_actions.create(create_data=bulk_data, collection_name=self.collection_name, bulk=True, batch_size=2)
+        self.assertEqual(statistic, {'success': 1, 'error': 0, 'duplicate': 4}, 'Bulk Create Statistic Fail')
+
+    def test_3_iter_retrieve(self):
+        result = self.mongo_actions.iter_retrieve(
+                        collection_name=self.collection_name,
+                        projection={'_id': 0, 'age': 1},
+                        sort=[('age', -1)],
+                        limit=3,
+                        chunk_size=2
+                    )
+        self.assertEqual(list(result), [[{'age': 100}, {'age': 30}], [{'age': 20}]], 'Iter Retrieve Fail')
+
     def test_3_update(self):
         query_syntax = {'_id': 0}
         update_result = self.mongo_actions.update(update_data={'name': 'test_update'}, query_syntax=query_syntax, collection_name=self.collection_name)
@@ -41,12 +75,57 @@ class MongoDBActionsTest(unittest.TestCase):
         result = self.mongo_actions.retrieve(collection_name=self.collection_name, query_syntax={'name': 'upsert_test'})
         self.assertEqual(result, upsert_data, 'Upsert=true, Fail')
 
+    def test_4_upsert_bulk(self):
+        upsert_data = [{'_id': 4, 'name': 'upsert_test', 'age': 40}, {'_id': 5, 'name': 'bulk_upsert', 'age': 50}]
+        statistic = self.mongo_actions.upsert(create_data=upsert_data, collection_name=self.collection_name, bulk=True, batch_size=1)
+        self.assertEqual(statistic, {'matched': 1, 'modified': 0, 'upserted': 1, 'error': 0}, 'Bulk Upsert Statistic Fail')
+
+    def test_4_upsert_skip_unchanged(self):
+        upsert_data = [{'_id': 30, 'name': 'hash_test', 'age': 30}, {'_id': 31, 'name': 'hash_test', 'age': 31}]
+        statistic = self.mongo_actions.upsert(create_data=upsert_data, collection_name=self.collection_name, skip_unchanged=True)
+        self.assertEqual(statistic['upserted'], 2, 'Incremental Upsert Fail')
+
+        upsert_data[1]['age'] = 32
+        statistic = self.mongo_actions.upsert(create_data=upsert_data, collection_name=self.collection_name, skip_unchanged=True)
+        self.assertEqual((statistic['skipped'], statistic['modified']), (1, 1), 'Skip Unchanged Fail')
+
+    def test_4_buffered_writer(self):
+        buffer_data = [{'_id': i, 'name': 'buffered_test', 'age': i} for i in range(20, 25)]
+        with BufferedMongoWriter(mongo_actions=self.mongo_actions, collection_name=self.collection_name, batch_size=2) as writer:
+            for doc in buffer_data:
+                writer.put(doc)
+            self.assertTrue(writer.flush(timeout=10), 'Flush Timeout')
+            result = self.mongo_actions.retrieve(collection_name=self.collection_name, query_syntax={'name': 'buffered_test'})
+            self.assertEqual(result, buffer_data, 'Buffered Write Fail')
+        self.assertEqual(writer.statistic, {'success': 5, 'error': 0, 'duplicate': 0}, 'Buffered Writer Statistic Fail')
+
     def test_5_delete(self):
         query_syntax = {'_id': 0}
         self.mongo_actions.delete(collection_name=self.collection_name, query_syntax=query_syntax)
         result = self.mongo_actions.retrieve(collection_name=self.collection_name, query_syntax=query_syntax)
         self.assertEqual(len(result), 0, 'Delete data Fail')
 
+    def test_6_ensure_index(self):
+        index_name = self.mongo_actions.ensure_index(collection_name=self.collection_name, keys='name')
+        self.assertIn(index_name, self.mongo_actions.mondb[self.collection_name].index_information(), 'Create Index Fail')
+        self.assertEqual(self.mongo_actions.ensure_index(collection_name=self.collection_name, keys='name'), index_name)
+
+    def test_6_explain_query(self):
+        summary = self.mongo_actions.explain_query(collection_name=self.collection_name, query_syntax={'age': 30})
+        self.assertTrue(summary['collscan'], 'Unindexed Query Should Be COLLSCAN')
+
+    def test_7_async_actions(self):
+        async def async_write():
+            async_actions = AsyncMongoDB_Actions(connect_info=self.MONGODB_CONN_INFO, max_workers=4)
+            async_data = [{'_id': i, 'name': 'async_test', 'age': i} for i in range(40, 44)]
+            await asyncio.gather(*[async_actions.create(create_data=d, collection_name=self.collection_name) for d in async_data])
+            result = await async_actions.retrieve(collection_name=self.collection_name, query_syntax={'name': 'async_test'}, sort=[('_id', 1)])
+            await async_actions.close()
+            return async_data, result
+
+        async_data, result = asyncio.run(async_write())
+        self.assertEqual(result, async_data, 'Async Create Fail')
+
     def test_9_drop_collection(self):
         drop_success = self.mongo_actions.drop_collection(collection_name=self.collection_name)
         self.assertTrue(drop_success, 'Drop collection Fail')
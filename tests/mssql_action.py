@@ -23,6 +23,16 @@ class TestTable(db):
     AccountType = Column(VARCHAR(32), nullable=False)
     Created_Time = Column(DATETIME, default=func.now())
 
+rename_db = declarative_base()
+
+class RenameTable(rename_db):
+    """ RenameTable, attribute key differ from column name """
+    __tablename__ = "RenameTable"
+    Id   = Column(INTEGER, primary_key=True, autoincrement=True)
+    AccountType = Column(VARCHAR(32), nullable=False)
+    Status = Column('status_flag', VARCHAR(16))
+
+
 
 class MssqlActionTest(unittest.TestCase):
     TEST_CONNECTION = {
@@ -41,6 +51,15 @@ class MssqlActionTest(unittest.TestCase):
     def test_1_connection(self):
         self.assertTrue(self.sql_action.check_connection(), 'Connection Fail')
 
+    def test_1_shared_engine(self):
+        other_action = MsSQL_Actions(connect_info=self.TEST_CONNECTION)
+        self.assertIs(other_action.db_engine, self.sql_action.db_engine, 'Engine Not Shared')
+
+        self.sql_action.check_connection()
+        status = self.sql_action.pool_status()
+        self.assertEqual(status['checked_out'], 0, 'Connection Not Return To Pool')
+        self.assertGreater(status['checkouts'], 0, 'Checkout Not Recorded')
+
     def test_2_init_database_table(self):
         self.sql_action.init_database(TestTable)
         db_path = os.path.join(self.ROOT_PATH, self.TEST_CONNECTION.get('database'))
@@ -72,6 +91,69 @@ class MssqlActionTest(unittest.TestCase):
         result = self.sql_action.retrieve(table_model=TestTable, filter_by_dict=query_dict)
         self.assertEqual(len(result), len(insert_data), 'create_data multiple fail')
 
+    def test_5_create_bulk_data(self):
+        insert_data = [{'AccountType': f'bulk_{i}', 'Created_Time': self.create_time} for i in range(10)]
+        self.sql_action.create(datas=insert_data, table_model=TestTable, bulk=True, chunk_size=3, return_ids=True)
+
+        result = self.sql_action.retrieve(table_model=TestTable, filter_by_dict={'Id': [i['Id'] for i in insert_data]})
+        self.assertEqual([i['AccountType'] for i in result], [i['AccountType'] for i in insert_data], 'bulk create fail')
+
+    def test_5_bulk_attribute_key(self):
+        self.sql_action.init_database(RenameTable)
+        insert_data = [{'AccountType': f'rename_{i}', 'Status': 'new'} for i in range(3)]
+        self.sql_action.create(datas=insert_data, table_model=RenameTable, bulk=True, return_ids=True)
+        result = self.sql_action.retrieve(table_model=RenameTable, filter_by_dict={'Id': [i['Id'] for i in insert_data]})
+        self.assertEqual([i['Status'] for i in result], ['new'] * 3, 'bulk create attribute key fail')
+
+        with self.assertRaises(ValueError):
+            self.sql_action.create(datas=[{'AccountType': 'rename', 'status': 'new'}], table_model=RenameTable, bulk=True)
+
+        statistic = self.sql_action.bulk_upsert(datas=[{'AccountType': 'rename_0', 'Status': 'done'}], table_model=RenameTable, key_columns='AccountType')
+        result = self.sql_action.retrieve(table_model=RenameTable, filter_by_dict={'AccountType': 'rename_0'})
+        self.assertEqual((statistic['updated'], result[0]['Status']), (1, 'done'), 'bulk upsert attribute key fail')
+        with self.assertRaises(ValueError):
+            self.sql_action.bulk_upsert(datas=[{'AccountType': 'rename_0', 'status': 'done'}], table_model=RenameTable, key_columns='AccountType')
+        self.sql_action.drop_table(table_model=RenameTable)
+
+    def test_5_iter_retrieve(self):
+        query_dict = {'AccountType': [f'type_{i}' for i in range(10)]}
+        chunks = list(self.sql_action.iter_retrieve(table_model=TestTable, filter_by_dict=query_dict, chunk_size=4))
+        self.assertEqual([len(c) for c in chunks], [4, 4, 2], 'iter_retrieve chunk fail')
+        self.assertEqual(set(chunks[0][0].keys()), {'Id', 'AccountType', 'Created_Time'}, 'iter_retrieve columns fail')
+
+    def test_6_bulk_upsert(self):
+        modify_time = datetime.strptime('2023-05-01 00:00:00','%Y-%m-%d %H:%M:%S')
+        upsert_data = [
+            {'AccountType': 'type_0', 'Created_Time': modify_time},
+            {'AccountType': 'upsert_new', 'Created_Time': modify_time}
+        ]
+        statistic = self.sql_action.bulk_upsert(datas=upsert_data, table_model=TestTable, key_columns='AccountType')
+        self.assertEqual(statistic, {'inserted': 1, 'updated': 1}, 'bulk upsert statistic fail')
+
+        result = self.sql_action.retrieve(table_model=TestTable, filter_by_dict={'AccountType': ['type_0', 'upsert_new']})
+        self.assertEqual([i['Created_Time'] for i in result], [modify_time, modify_time], 'bulk upsert fail')
+
+        # row without column never overwrite exist value with NULL
+        mixed_data = [{'AccountType': 'upsert_new', 'Created_Time': self.create_time}, {'AccountType': 'type_1'}]
+        statistic = self.sql_action.bulk_upsert(datas=mixed_data, table_model=TestTable, key_columns='AccountType')
+        result = self.sql_action.retrieve(table_model=TestTable, filter_by_dict={'AccountType': ['type_1', 'upsert_new']})
+        self.assertEqual([i['Created_Time'] for i in result], [self.create_time, self.create_time], 'bulk upsert mixed columns fail')
+
+    def test_5_retrieve_large_in(self):
+        query_dict = {'AccountType': [f'type_{i}' for i in range(10)] + ['type_0', 'not_exist']}
+        for large_in in ['chunk', 'temp_table']:
+            result = self.sql_action.retrieve(table_model=TestTable, filter_by_dict=query_dict, in_chunk_size=3, large_in=large_in)
+            self.assertEqual(len(result), 10, f'retrieve large in with {large_in} fail')
+
+    def test_5_iter_syntax_query(self):
+        sqry = 'SELECT AccountType FROM TestTable WHERE AccountType LIKE :prefix ORDER BY Id'
+        chunks = list(self.sql_action.iter_syntax_query(sqry, params={'prefix': 'type_%'}, chunk_size=4))
+        self.assertEqual([len(c) for c in chunks], [4, 4, 2], 'iter_syntax_query chunk fail')
+        self.assertEqual(chunks[0][0], {'AccountType': 'type_0'}, 'iter_syntax_query bind params fail')
+
+        frames = list(self.sql_action.iter_syntax_query(sqry, params={'prefix': 'type_%'}, chunk_size=6, as_dataframe=True))
+        self.assertEqual([len(f) for f in frames], [6, 4], 'iter_syntax_query dataframe fail')
+
     def test_6_update(self):
         self.sql_action.update(table_model=TestTable, data_id=1, update_data={'AccountType': 'Test_Modify'})
         result = self.sql_action.retrieve(table_model=TestTable, filter_by_dict={'Id': 1})
@@ -86,6 +168,31 @@ class MssqlActionTest(unittest.TestCase):
         result = self.sql_action.retrieve(table_model=TestTable, filter_by_dict={'Id': 1})
         self.assertEqual(result, [], 'delete record Fail')
 
+    def test_7_batch_update_delete(self):
+        bulk_rows = self.sql_action.retrieve(table_model=TestTable, filter_by_dict={'AccountType': [f'bulk_{i}' for i in range(10)]})
+        bulk_ids = [i['Id'] for i in bulk_rows]
+
+        updated = self.sql_action.batch_update(table_model=TestTable, update_data={'AccountType': 'batch'}, data_ids=bulk_ids[:5], chunk_size=2)
+        self.assertEqual(updated, 5, 'batch update by ids fail')
+
+        records = [{'Id': i, 'AccountType': f'batch_{i}'} for i in bulk_ids[5:]]
+        updated = self.sql_action.batch_update(table_model=TestTable, update_data=records, chunk_size=2)
+        self.assertEqual(updated, 5, 'batch update records rowcount fail')
+
+        # driver without reliable executemany rowcount return None
+        dialect = self.sql_action.db_engine.dialect
+        dialect.supports_sane_multi_rowcount = False
+        try:
+            updated = self.sql_action.batch_update(table_model=TestTable, update_data=records, chunk_size=2)
+        finally:
+            dialect.supports_sane_multi_rowcount = True
+        self.assertIsNone(updated, 'batch update unreliable rowcount should be None')
+        result = self.sql_action.retrieve(table_model=TestTable, filter_by_dict={'Id': bulk_ids[5:]})
+        self.assertEqual([i['AccountType'] for i in result], [i['AccountType'] for i in records], 'batch update records fail')
+
+        deleted = self.sql_action.batch_delete(table_model=TestTable, data_ids=bulk_ids, chunk_size=3)
+        self.assertEqual(deleted, len(bulk_ids), 'batch delete fail')
+
     def test_8_drop_table(self):
         # drop table
         self.sql_action.drop_table(table_model=TestTable)
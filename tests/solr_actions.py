@@ -0,0 +1,143 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.crawler_toolkit.output_data import Solr_Actions
+
+import json
+import threading
+import unittest
+from urllib.parse import urlparse, parse_qs
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+
+class StubSolrHandler(BaseHTTPRequestHandler):
+    ''' stub solr core, record update requests '''
+    protocol_version = 'HTTP/1.1'
+    requests = list()
+    fail_times = 0
+    lock = threading.Lock()
+    documents = [{'id': f'{i:03d}', 'name': f'test_{i}'} for i in range(7)]
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_json(self, data: dict, status: int=200):
+        body = json.dumps(data).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = parse_qs(url.query)
+        self.requests.append({'path': url.path, 'params': params, 'action': 'select', 'body': ''})
+        # documents sorted by id, cursor mark is last returned id
+        cursor_mark = params['cursorMark'][0]
+        rows = int(params['rows'][0])
+        docs = [d for d in self.documents if cursor_mark == '*' or d['id'] > cursor_mark][:rows]
+        if 'fl' in params:
+            fields = params['fl'][0].split(',')
+            docs = [{k: v for k, v in d.items() if k in fields} for d in docs]
+        next_cursor_mark = docs[-1]['id'] if docs else cursor_mark
+        self.send_json({'response': {'numFound': len(self.documents), 'start': 0, 'docs': docs}, 'nextCursorMark': next_cursor_mark})
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0))).decode('utf-8')
+        with StubSolrHandler.lock:
+            fail = StubSolrHandler.fail_times > 0
+            StubSolrHandler.fail_times -= fail
+        if fail:
+            return self.send_json({'error': {'msg': 'stub server error', 'code': 503}}, status=503)
+        action = 'add' if body.startswith('[') or body.startswith('<add') else body.lstrip('<').split(' ')[0].split('>')[0]
+        self.requests.append({'path': url.path, 'params': parse_qs(url.query), 'action': action, 'body': body})
+        self.send_json({'responseHeader': {'status': 0, 'QTime': 1}})
+
+
+class SolrActionsTest(unittest.TestCase):
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubSolrHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    solr_url = f'http://127.0.0.1:{server.server_address[1]}/solr/unittest'
+    fake_data = [{'id': str(i), 'name': f'test_{i}'} for i in range(5)]
+
+    def setUp(self):
+        StubSolrHandler.requests.clear()
+        StubSolrHandler.fail_times = 0
+
+    def test_1_create_batch(self):
+        solr_actions = Solr_Actions(solr_url=self.solr_url, batch_size=2)
+        solr_actions.create(create_data=self.fake_data)
+        actions = [r['action'] for r in StubSolrHandler.requests]
+        self.assertEqual(actions, ['add', 'add', 'add', 'commit'], 'Batch Add Fail')
+
+    def test_1_create_commit_within(self):
+        solr_actions = Solr_Actions(solr_url=self.solr_url, batch_size=2, commit_within=5000)
+        solr_actions.create(create_data=self.fake_data)
+        self.assertEqual(len(StubSolrHandler.requests), 3, 'Commit Within Should Not Commit')
+        self.assertEqual(StubSolrHandler.requests[0]['params'].get('commitWithin'), ['5000'], 'Commit Within Param Fail')
+
+        solr_actions.flush()
+        self.assertEqual(StubSolrHandler.requests[-1]['action'], 'commit', 'Flush Fail')
+
+    def test_1_parallel_create(self):
+        solr_actions = Solr_Actions(solr_url=self.solr_url, max_retries=3, retry_backoff=0)
+        StubSolrHandler.fail_times = 2
+        statistic = solr_actions.parallel_create(create_data=self.fake_data, batch_size=2, max_workers=3)
+        self.assertEqual((statistic['success'], statistic['error'], statistic['batch']), (5, 0, 3), 'Parallel Create Retry Fail')
+        self.assertLessEqual(statistic['latency_avg'], statistic['latency_max'], 'Batch Latency Fail')
+
+        actions = [r['action'] for r in StubSolrHandler.requests]
+        self.assertEqual(sorted(actions), ['add', 'add', 'add', 'commit'], 'Parallel Add Fail')
+        solr_actions.close()
+
+    def test_1_parallel_create_error(self):
+        solr_actions = Solr_Actions(solr_url=self.solr_url, max_retries=1, retry_backoff=0)
+        StubSolrHandler.fail_times = 2
+        statistic = solr_actions.parallel_create(create_data=self.fake_data[:2], max_workers=2, commit=False)
+        self.assertEqual((statistic['success'], statistic['error']), (0, 2), 'Retry Exhausted Should Fail')
+        solr_actions.close()
+
+    def test_1_partial_update(self):
+        solr_actions = Solr_Actions(solr_url=self.solr_url, batch_size=2, commit_within=1000)
+        update_data = [{'id': str(i), 'status': 'done', 'view_count': 1} for i in range(3)]
+        solr_actions.partial_update(update_data=update_data, modifiers={'view_count': 'inc'})
+
+        adds = [r for r in StubSolrHandler.requests if r['action'] == 'add']
+        self.assertEqual((len(adds), len(StubSolrHandler.requests)), (2, 2), 'Partial Update Batch Fail')
+        # pysolr send atomic update with xml or json depend on version
+        if adds[0]['body'].startswith('<add'):
+            self.assertIn('<field name="view_count" update="inc">1</field>', adds[0]['body'], 'Atomic Update Modifier Fail')
+        else:
+            self.assertEqual(json.loads(adds[0]['body'])[0], {'id': '0', 'status': {'set': 'done'}, 'view_count': {'inc': 1}}, 'Atomic Update Modifier Fail')
+        self.assertEqual(adds[0]['params'].get('commitWithin'), ['1000'], 'Commit Within Param Fail')
+
+        with self.assertRaises(ValueError):
+            solr_actions.partial_update(update_data=update_data, modifiers={'status': 'replace'})
+
+    def test_2_iter_retrieve(self):
+        solr_actions = Solr_Actions(solr_url=self.solr_url)
+        chunks = list(solr_actions.iter_retrieve(fl=['id'], fq='name:test*', rows=3, chunk_size=4))
+        self.assertEqual(chunks, [[{'id': f'{i:03d}'} for i in range(4)], [{'id': f'{i:03d}'} for i in range(4, 7)]], 'Iter Retrieve Fail')
+
+        selects = [r['params'] for r in StubSolrHandler.requests]
+        self.assertEqual([p['cursorMark'][0] for p in selects], ['*', '002', '005', '006'], 'Cursor Mark Paging Fail')
+        self.assertEqual((selects[0]['sort'], selects[0]['fq']), (['id asc'], ['name:test*']), 'Sort Or Filter Query Fail')
+
+    def test_2_retrieve(self):
+        solr_actions = Solr_Actions(solr_url=self.solr_url)
+        result = solr_actions.retrieve(query_sytax='*:*', sort='name desc', rows=5)
+        self.assertEqual(len(result), 7, 'Retrieve All Pages Fail')
+        self.assertEqual(StubSolrHandler.requests[0]['params']['sort'], ['name desc, id asc'], 'Unique Key Tie Breaker Fail')
+
+    def test_2_delete_batch(self):
+        solr_actions = Solr_Actions(solr_url=self.solr_url, batch_size=3)
+        solr_actions.delete(id_code=[i['id'] for i in self.fake_data], commit=False)
+        actions = [r['action'] for r in StubSolrHandler.requests]
+        self.assertEqual(actions, ['delete', 'delete'], 'Batch Delete Fail')
+
+if __name__ == '__main__':
+    unittest.main()